@@ -1,15 +1,81 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Literal
 import os
 
 class Settings(BaseSettings):
     # Configurações do banco de dados
     DATABASE_URL: str
 
+    # Pool de conexões do banco (por worker) e cache de prepared statements do asyncpg
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800 # -1 desativa a reciclagem de conexões
+    DB_POOL_PRE_PING: bool = False
+    DB_STATEMENT_CACHE_SIZE: int = 100 # 0 desativa (necessário atrás de pgbouncer em modo transaction)
+
+    # Log de queries: echo loga tudo (só para depuração); o log de lentas registra apenas
+    # statements acima do limite, com a rota de origem e, opcionalmente, o EXPLAIN
+    DB_ECHO: bool = False
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    SLOW_QUERY_EXPLAIN: bool = False
+    QUERY_STATS_TOP_N: int = 20
+    QUERY_STATS_MAX_STATEMENTS: int = 1000
+
     # Configurações de segurança para JWT
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
 
+    # Hash de senhas (bcrypt): custo e limites do executor que tira o hash do event loop
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_MAX_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = 5.0
+
+    # Cache em processo das versões de token dos usuários (evita buscar o usuário a cada requisição)
+    TOKEN_VERSION_CACHE_SIZE: int = 10000
+    TOKEN_VERSION_CACHE_TTL_SECONDS: float = 30.0
+
+    # Cache em processo do catálogo de produtos
+    PRODUCT_CACHE_SIZE: int = 1024
+    PRODUCT_CACHE_TTL_SECONDS: float = 30.0
+
+    # Importação em massa do catálogo: linhas gravadas por lote (um INSERT ... ON CONFLICT por lote)
+    PRODUCT_IMPORT_BATCH_SIZE: int = 1000
+    PRODUCT_IMPORT_MAX_RECORD_BYTES: int = 65536 # Linhas/registros maiores são rejeitados (memória limitada)
+
+    # Exportação de pedidos: linhas buscadas por vez no cursor do servidor
+    ORDER_EXPORT_YIELD_PER: int = 1000
+
+    # Listagens grandes montam o JSON direto dos resultados, sem revalidar pelo response_model
+    FAST_JSON_RESPONSES: bool = False
+
+    # Autocomplete de nomes de produtos: intervalo de recarga completa do índice em memória (0 desativa)
+    PRODUCT_AUTOCOMPLETE_REFRESH_SECONDS: float = 300.0
+
+    # Chaves de idempotência de POST /orders: validade e intervalo da limpeza em lote (0 desativa)
+    IDEMPOTENCY_KEY_TTL_HOURS: float = 24.0
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: float = 3600.0
+
+    # Consolidados de vendas: linhas por dia em sales_daily (espalha a disputa entre checkouts)
+    SALES_ROLLUP_SHARDS: int = 16
+
+    # Métricas por rota exportadas em /metrics (formato de texto do Prometheus)
+    METRICS_ENABLED: bool = True
+
+    # Orçamento de queries por requisição e detecção de N+1: "log" registra, "raise" (testes) levanta, "off" desliga
+    QUERY_BUDGET_MODE: Literal["off", "log", "raise"] = "log"
+    N_PLUS_ONE_THRESHOLD: int = 5 # Execuções do mesmo statement numa requisição para sinalizar N+1
+    # Relacionamentos de Order, OrderItem e User levantam erro em vez de fazer lazy load implícito
+    RAISE_ON_LAZY_LOAD: bool = False
+
+    # Réplica de leitura opcional para as rotas GET (atraso tolerado e janela de read-your-writes)
+    DATABASE_REPLICA_URL: str | None = None
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_LAG_CHECK_SECONDS: float = 5.0
+    REPLICA_RETRY_SECONDS: float = 30.0 # Tempo fora de uso depois de uma falha de conexão
+    READ_YOUR_WRITES_SECONDS: float = 10.0 # Leituras no primário depois de uma escrita do cliente
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
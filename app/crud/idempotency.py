@@ -0,0 +1,73 @@
+# app/crud/idempotency.py
+
+from datetime import timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import delete, func, update
+from sqlalchemy.dialects import postgresql, sqlite
+from fastapi import HTTPException, status
+
+from app.models.idempotency import IdempotencyKey
+
+async def claim_key(db: AsyncSession, user_id: int, key: str, request_hash: str) -> str | None:
+    """
+    Reserva a chave de idempotência na transação atual, antes de criar o pedido.
+    Retorna None se a chave é nova (o pedido deve ser criado), ou a resposta
+    armazenada se a chave já foi usada (a requisição é uma repetição).
+    Reusar a chave com outro corpo (request_hash diferente) é erro 422.
+
+    Se outra requisição com a mesma chave ainda estiver em andamento, o INSERT
+    fica bloqueado no índice único até ela terminar: com commit, esta vira uma
+    repetição; com rollback (ex: estoque insuficiente), a chave fica livre e
+    esta requisição segue normalmente.
+    """
+    dialect_insert = sqlite.insert if db.bind.dialect.name == "sqlite" else postgresql.insert
+    claimed = await db.scalar(
+        dialect_insert(IdempotencyKey)
+        .values(user_id=user_id, key=key, request_hash=request_hash)
+        .on_conflict_do_nothing(index_elements=[IdempotencyKey.user_id, IdempotencyKey.key])
+        .returning(IdempotencyKey.id)
+    )
+    if claimed is not None:
+        return None
+
+    result = await db.execute(
+        select(IdempotencyKey.response, IdempotencyKey.request_hash)
+        .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+    )
+    stored = result.one_or_none()
+    # Chaves gravadas antes do hash existir (request_hash nulo) não são comparadas
+    if stored is not None and stored.request_hash is not None and stored.request_hash != request_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Esta Idempotency-Key já foi usada com outro corpo de requisição."
+        )
+    response = stored.response if stored is not None else None
+    if response is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Uma requisição com esta Idempotency-Key ainda está em processamento."
+        )
+    return response
+
+async def save_response(db: AsyncSession, user_id: int, key: str, order_id: int, response: str) -> None:
+    """Associa o pedido criado e a resposta serializada à chave reservada (sem commit)."""
+    await db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+        .values(order_id=order_id, response=response)
+    )
+
+async def delete_expired_keys(db: AsyncSession, ttl: timedelta) -> int:
+    """
+    Remove em lote as chaves criadas há mais de ttl. Retorna quantas foram removidas.
+    O corte é calculado no banco, com o mesmo relógio (e fuso) do now() que gravou created_at.
+    """
+    if db.bind.dialect.name == "sqlite":
+        cutoff = func.datetime("now", f"-{int(ttl.total_seconds())} seconds") # CURRENT_TIMESTAMP, em UTC
+    else:
+        cutoff = func.now() - ttl
+    result = await db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff))
+    await db.commit()
+    return result.rowcount
@@ -1,136 +1,261 @@
 # app/crud/order.py
 
+from datetime import datetime
+
+from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import delete
-from sqlalchemy.orm import relationship, selectinload # <--- Esta linha está correta
+from sqlalchemy import delete, insert, tuple_, update
+from sqlalchemy.orm import relationship, selectinload, load_only # <--- Esta linha está correta
+from sqlalchemy.orm.attributes import set_committed_value
 from app.models.order import Order, OrderItem
-from app.models.product import Product
-from app.schemas.order import OrderCreate, OrderUpdate
-from fastapi import HTTPException, status
+from app.schemas.order import OrderCreate, OrderUpdate, OrderResponse, OrderBulkStatusUpdate, ORDER_STATUS_TRANSITIONS
+from app.crud import idempotency as crud_idempotency
+from app.crud import sales as crud_sales
+from app.crud import order_summary as crud_order_summary
+from app.services import stock_service
 
-async def create_order(db: AsyncSession, user_id: int, order_data: OrderCreate):
+async def create_order(db: AsyncSession, user_id: int, order_data: OrderCreate, idempotency_key: str | None = None):
     """
     Cria um novo pedido para um usuário, processa os itens, calcula o total
     e subtrai o estoque dos produtos.
+    Com idempotency_key (já reservada com crud.idempotency.claim_key na mesma transação),
+    a resposta do pedido fica gravada junto com a chave, no mesmo commit.
     """
-    total_amount = 0
-    order_items_db = []
-
+    # Agrupa itens repetidos do mesmo produto, somando as quantidades
+    quantities = {}
     for item_data in order_data.items:
-        # Busca o produto pelo ID
-        product = await db.execute(select(Product).where(Product.id == item_data.product_id))
-        product = product.scalar_one_or_none()
-
-        if not product:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Produto com ID {item_data.product_id} não encontrado."
-            )
-        
-        if not product.is_active:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Produto '{product.name}' não está ativo para compra."
-            )
-
-        if product.stock < item_data.quantity:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Estoque insuficiente para o produto '{product.name}'. Disponível: {product.stock}, Solicitado: {item_data.quantity}."
-            )
-
-        # Adiciona ao total e cria o OrderItem
-        item_price = product.price
-        total_amount += item_price * item_data.quantity
-        
-        order_item = OrderItem(
-            product_id=product.id,
-            quantity=item_data.quantity,
-            price_at_purchase=item_price
-        )
-        order_items_db.append(order_item)
-        
-        # Diminui o estoque do produto
-        product.stock -= item_data.quantity
-        db.add(product) # Marca o produto para atualização no commit
-
-    # Cria o objeto Order principal
-    db_order = Order(
-        user_id=user_id,
-        total_amount=total_amount,
-        status="pending",
-        items=order_items_db # Adiciona os itens criados ao pedido
+        quantities[item_data.product_id] = quantities.get(item_data.product_id, 0) + item_data.quantity
+
+    # Baixa o estoque de todos os produtos em um único UPDATE condicional e atômico
+    prices = await stock_service.reserve_stock(db, quantities)
+
+    total_amount = sum(prices[product_id] * quantity for product_id, quantity in quantities.items())
+
+    # Cria o pedido e já recebe o ID e a data gerados pelo banco (INSERT ... RETURNING)
+    db_order = await db.scalar(
+        insert(Order)
+        .values(user_id=user_id, total_amount=total_amount, status="pending")
+        .returning(Order)
     )
 
-    db.add(db_order)
-    await db.commit()
-    await db.refresh(db_order) # Atualiza o objeto com os IDs gerados pelo DB
-    # Recarrega os itens para garantir que o relacionamento está populado após refresh do order
-    await db.refresh(db_order, attribute_names=["items"])
-    for item in db_order.items:
-        await db.refresh(item, attribute_names=["product"]) # Opcional, para carregar o objeto Product se precisar
+    # Cria todos os itens em um único INSERT de várias linhas, também com RETURNING
+    items = await db.scalars(
+        insert(OrderItem).returning(OrderItem),
+        [
+            {
+                "order_id": db_order.id,
+                "product_id": product_id,
+                "quantity": quantity,
+                "price_at_purchase": prices[product_id],
+            }
+            for product_id, quantity in quantities.items()
+        ],
+    )
+    # Popula o relacionamento com os itens já em memória, sem nova query
+    set_committed_value(db_order, "items", list(items))
+
+    # Atualiza os consolidados de vendas e o resumo do usuário na mesma transação do pedido
+    await crud_sales.add_order(db, db_order.order_date.date(), db_order.items)
+    await crud_order_summary.add_order(db, user_id, db_order.total_amount, db_order.order_date)
 
+    if idempotency_key is not None:
+        response = OrderResponse.model_validate(db_order).model_dump_json()
+        await crud_idempotency.save_response(db, user_id, idempotency_key, db_order.id, response)
+
+    await db.commit()
     return db_order
 
+def order_items_loader():
+    """
+    Opção de carregamento das listagens de pedidos: só os itens, e só as colunas que o
+    OrderResponse usa. Produto e usuário não são carregados, pois a resposta não os inclui.
+    """
+    return selectinload(Order.items).load_only(
+        OrderItem.id,
+        OrderItem.order_id,
+        OrderItem.product_id,
+        OrderItem.quantity,
+        OrderItem.price_at_purchase,
+    )
+
 async def get_order(db: AsyncSession, order_id: int):
     """Retorna um pedido específico pelo ID, com seus itens."""
     result = await db.execute(
         select(Order)
         .where(Order.id == order_id)
-        .options(
-            # Carrega os itens do pedido e, para cada item, carrega o produto associado
-            selectinload(Order.items).selectinload(OrderItem.product) # <--- CORRIGIDO
-        )
+        .options(order_items_loader()) # Carrega os itens do pedido (sem os produtos)
     )
     return result.scalar_one_or_none()
 
-async def get_user_orders(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100):
-    """Retorna todos os pedidos de um usuário específico."""
-    result = await db.execute(
+def _paginate_orders(query, skip: int, limit: int, after: tuple[datetime, int] | None):
+    """
+    Aplica a ordenação (order_date, id) decrescente e a paginação a uma query de pedidos.
+    Com after=(order_date, id) usa paginação por chave (keyset) em vez de OFFSET.
+    """
+    query = query.order_by(Order.order_date.desc(), Order.id.desc()).limit(limit)
+    if after is not None:
+        query = query.where(tuple_(Order.order_date, Order.id) < tuple_(*after))
+    else:
+        query = query.offset(skip)
+    return query
+
+async def get_user_orders(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100, after: tuple[datetime, int] | None = None):
+    """Retorna todos os pedidos de um usuário específico, do mais recente para o mais antigo."""
+    query = (
         select(Order)
         .where(Order.user_id == user_id)
-        .offset(skip)
-        .limit(limit)
-        .options(
-            selectinload(Order.items).selectinload(OrderItem.product) # <--- CORRIGIDO
-        )
-        .order_by(Order.order_date.desc()) # Ordena por data mais recente
+        .options(order_items_loader())
     )
+    result = await db.execute(_paginate_orders(query, skip, limit, after))
     return result.scalars().all()
 
-async def get_all_orders(db: AsyncSession, skip: int = 0, limit: int = 100):
+async def get_all_orders(db: AsyncSession, skip: int = 0, limit: int = 100, after: tuple[datetime, int] | None = None):
     """Retorna todos os pedidos (para admin), com paginação."""
-    result = await db.execute(
+    query = (
         select(Order)
-        .offset(skip)
-        .limit(limit)
-        .options(
-            selectinload(Order.items).selectinload(OrderItem.product), # <--- CORRIGIDO
-            selectinload(Order.user) # Opcional: carregar dados do usuário também <--- CORRIGIDO
-        )
-        .order_by(Order.order_date.desc())
+        .options(order_items_loader())
     )
+    result = await db.execute(_paginate_orders(query, skip, limit, after))
     return result.scalars().all()
 
+async def stream_orders_with_items(
+    db: AsyncSession,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    status: str | None = None,
+    yield_per: int = 1000,
+):
+    """
+    Percorre os pedidos (com seus itens) em uma única query com cursor no servidor,
+    buscando yield_per linhas por vez, e gera um dicionário por pedido.
+    A memória usada não depende do número de pedidos exportados.
+    """
+    query = (
+        select(
+            Order.id, Order.user_id, Order.order_date, Order.total_amount, Order.status,
+            OrderItem.id.label("item_id"), OrderItem.product_id, OrderItem.quantity, OrderItem.price_at_purchase,
+        )
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .order_by(Order.id, OrderItem.id)
+        .execution_options(yield_per=yield_per)
+    )
+    if date_from is not None:
+        query = query.where(Order.order_date >= date_from)
+    if date_to is not None:
+        query = query.where(Order.order_date < date_to)
+    if status is not None:
+        query = query.where(Order.status == status)
+
+    result = await db.stream(query)
+    order = None
+    async for row in result:
+        # As linhas vêm ordenadas por pedido: um pedido termina quando o ID muda
+        if order is None or order["id"] != row.id:
+            if order is not None:
+                yield order
+            order = {
+                "id": row.id,
+                "user_id": row.user_id,
+                "order_date": row.order_date,
+                "total_amount": row.total_amount,
+                "status": row.status,
+                "items": [],
+            }
+        if row.item_id is not None:
+            order["items"].append({
+                "id": row.item_id,
+                "product_id": row.product_id,
+                "quantity": row.quantity,
+                "price_at_purchase": row.price_at_purchase,
+            })
+    if order is not None:
+        yield order
+
 async def update_order_status(db: AsyncSession, order_id: int, order_update: OrderUpdate):
-    """Atualiza o status de um pedido."""
-    db_order = await get_order(db, order_id)
-    if not db_order:
-        return None
-    
+    """
+    Atualiza o status de um pedido, respeitando ORDER_STATUS_TRANSITIONS (o mesmo quadro
+    da mudança em lote). Transição não permitida levanta 409; repetir o status atual é aceito.
+    """
     update_data = order_update.model_dump(exclude_unset=True)
-    if "status" in update_data:
-        db_order.status = update_data["status"]
-    
+    if "status" not in update_data:
+        return await get_order(db, order_id)
+
+    # Status anterior (com a linha travada), para saber se o pedido entra ou sai de "cancelled"
+    old_status = await db.scalar(select(Order.status).where(Order.id == order_id).with_for_update())
+    if old_status is None:
+        return None
+    new_status = update_data["status"]
+    if new_status != old_status and new_status not in ORDER_STATUS_TRANSITIONS.get(old_status, set()):
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Não é possível mudar o status do pedido de '{old_status}' para '{new_status}'.",
+        )
+
+    # Atualiza e já recebe o pedido atualizado (UPDATE ... RETURNING)
+    db_order = await db.scalar(
+        update(Order)
+        .where(Order.id == order_id)
+        .values(status=new_status)
+        .returning(Order)
+    )
+
+    # Carrega os itens para a resposta completa em uma única query
+    items = await db.scalars(
+        select(OrderItem)
+        .where(OrderItem.order_id == order_id)
+        .order_by(OrderItem.id)
+        .options(load_only(OrderItem.id, OrderItem.order_id, OrderItem.product_id, OrderItem.quantity, OrderItem.price_at_purchase))
+    )
+    set_committed_value(db_order, "items", list(items))
+
+    # Cancelar retira o pedido dos consolidados de vendas (nenhuma transição sai de "cancelled")
+    if old_status != crud_sales.CANCELLED_STATUS and db_order.status == crud_sales.CANCELLED_STATUS:
+        await crud_sales.add_order(db, db_order.order_date.date(), db_order.items, sign=-1)
+        await crud_order_summary.add_order(db, db_order.user_id, db_order.total_amount, db_order.order_date, sign=-1)
+
     await db.commit()
-    await db.refresh(db_order)
-    # Recarrega os itens e produtos para a resposta completa
-    await db.refresh(db_order, attribute_names=["items"])
-    for item in db_order.items:
-        await db.refresh(item, attribute_names=["product"])
     return db_order
 
+async def bulk_update_order_status(db: AsyncSession, bulk_update: OrderBulkStatusUpdate) -> list[int]:
+    """
+    Muda o status de vários pedidos em um único UPDATE ... WHERE id IN (...).
+    Só são alterados os pedidos cujo status atual permite a transição para o novo status;
+    os demais são ignorados. Retorna os IDs dos pedidos alterados.
+    """
+    allowed_from = [current for current, targets in ORDER_STATUS_TRANSITIONS.items() if bulk_update.status in targets]
+    if bulk_update.current_status is not None:
+        allowed_from = [current for current in allowed_from if current == bulk_update.current_status]
+    if not allowed_from:
+        return []
+
+    stmt = (
+        update(Order)
+        .where(Order.status.in_(allowed_from))
+        .values(status=bulk_update.status)
+        .returning(Order.id)
+        .execution_options(synchronize_session=False)
+    )
+    if bulk_update.order_ids is not None:
+        stmt = stmt.where(Order.id.in_(bulk_update.order_ids))
+    if bulk_update.date_from is not None:
+        stmt = stmt.where(Order.order_date >= bulk_update.date_from)
+    if bulk_update.date_to is not None:
+        stmt = stmt.where(Order.order_date < bulk_update.date_to)
+
+    result = await db.execute(stmt)
+    updated_ids = sorted(result.scalars().all())
+
+    # Pedidos cancelados saem dos consolidados de vendas e dos resumos dos usuários
+    # (nenhuma transição sai de "cancelled")
+    if bulk_update.status == crud_sales.CANCELLED_STATUS:
+        await crud_sales.remove_orders(db, updated_ids)
+        await crud_order_summary.remove_orders(db, updated_ids)
+
+    await db.commit()
+    return updated_ids
+
 # A função de delete de pedido pode ser adicionada aqui, se desejado.
 # Geralmente, pedidos não são deletados, mas sim cancelados.
 # async def delete_order(db: AsyncSession, order_id: int):
@@ -0,0 +1,84 @@
+# app/crud/order_summary.py
+
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import func, delete, insert, case
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.models.order import Order
+from app.models.order_summary import UserOrderSummary
+from app.crud.sales import CANCELLED_STATUS
+
+async def get_summary(db: AsyncSession, user_id: int):
+    """Retorna o resumo de pedidos do usuário (None se ele nunca fez um pedido)."""
+    return await db.get(UserOrderSummary, user_id)
+
+async def add_orders(db: AsyncSession, rows: list[dict]) -> None:
+    """
+    Soma deltas aos resumos (sem commit, na transação do pedido). Cada linha tem
+    user_id, order_count, lifetime_spend e last_order_date (None para não alterar a data).
+    """
+    if not rows:
+        return
+    sqlite_dialect = db.bind.dialect.name == "sqlite"
+    dialect_insert = sqlite.insert if sqlite_dialect else postgresql.insert
+    greatest = func.max if sqlite_dialect else func.greatest # max(a, b) é o greatest do SQLite
+
+    stmt = dialect_insert(UserOrderSummary).values(rows)
+    current, new = UserOrderSummary.last_order_date, stmt.excluded.last_order_date
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserOrderSummary.user_id],
+        set_={
+            "order_count": UserOrderSummary.order_count + stmt.excluded.order_count,
+            "lifetime_spend": UserOrderSummary.lifetime_spend + stmt.excluded.lifetime_spend,
+            # coalesce nos dois lados: uma data nula nunca apaga a existente
+            "last_order_date": greatest(func.coalesce(current, new), func.coalesce(new, current)),
+        },
+    )
+    await db.execute(stmt)
+
+async def add_order(db: AsyncSession, user_id: int, total_amount: float, order_date: datetime, sign: int = 1) -> None:
+    """Aplica um pedido ao resumo do usuário; sign=-1 retira um pedido cancelado."""
+    await add_orders(db, [{
+        "user_id": user_id,
+        "order_count": sign,
+        "lifetime_spend": sign * total_amount,
+        "last_order_date": order_date if sign > 0 else None,
+    }])
+
+async def remove_orders(db: AsyncSession, order_ids: list[int]) -> None:
+    """Retira vários pedidos (ex: cancelamento em lote) dos resumos, agregados por usuário."""
+    if not order_ids:
+        return
+    result = await db.execute(
+        select(Order.user_id, func.count(Order.id).label("order_count"), func.sum(Order.total_amount).label("lifetime_spend"))
+        .where(Order.id.in_(order_ids))
+        .group_by(Order.user_id)
+    )
+    await add_orders(db, [
+        {"user_id": row.user_id, "order_count": -row.order_count, "lifetime_spend": -row.lifetime_spend, "last_order_date": None}
+        for row in result.all()
+    ])
+
+async def rebuild(db: AsyncSession) -> None:
+    """
+    Recalcula os resumos do zero a partir de orders, e faz commit. Quantidade e total
+    ignoram cancelados; a data do último pedido considera todos, como no incremental.
+    """
+    active = Order.status != CANCELLED_STATUS
+    await db.execute(delete(UserOrderSummary))
+    await db.execute(
+        insert(UserOrderSummary).from_select(
+            ["user_id", "order_count", "lifetime_spend", "last_order_date"],
+            select(
+                Order.user_id,
+                func.sum(case((active, 1), else_=0)),
+                func.sum(case((active, Order.total_amount), else_=0.0)),
+                func.max(Order.order_date),
+            )
+            .group_by(Order.user_id),
+        )
+    )
+    await db.commit()
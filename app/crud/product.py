@@ -2,9 +2,10 @@
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import delete
-from app.models.product import Product
-from app.schemas.product import ProductCreate, ProductUpdate
+from sqlalchemy import case, delete, func, insert, literal_column, or_, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.product import Product, SEARCH_CONFIG, product_search_vector
+from app.schemas.product import ProductCreate, ProductFilters, ProductUpdate
 
 async def get_product(db: AsyncSession, product_id: int):
     """Retorna um produto pelo ID."""
@@ -16,32 +17,134 @@ async def get_product_by_name(db: AsyncSession, name: str):
     result = await db.execute(select(Product).where(Product.name == name))
     return result.scalar_one_or_none()
 
-async def get_products(db: AsyncSession, skip: int = 0, limit: int = 100):
-    """Retorna uma lista de produtos com paginação."""
-    result = await db.execute(select(Product).offset(skip).limit(limit))
+# Colunas de ordenação aceitas na listagem (o ID sempre desempata)
+SORT_COLUMNS = {"id": Product.id, "price": Product.price, "name": Product.name}
+
+async def get_products(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    filters: ProductFilters | None = None,
+    after: tuple | None = None,
+):
+    """
+    Retorna uma lista de produtos com paginação, filtrada e ordenada conforme filters
+    (por padrão, todos os produtos ordenados por ID).
+    Se after=(valor da coluna de ordenação, id) for informado, usa paginação por chave
+    (keyset) a partir desse ponto em vez de OFFSET.
+    """
+    filters = filters or ProductFilters()
+    sort_column = SORT_COLUMNS[filters.sort]
+    descending = filters.order == "desc"
+
+    query = select(Product).limit(limit)
+    if filters.active_only:
+        query = query.where(Product.is_active.is_(True))
+    if filters.in_stock:
+        query = query.where(Product.stock > 0)
+    if filters.min_price is not None:
+        query = query.where(Product.price >= filters.min_price)
+    if filters.max_price is not None:
+        query = query.where(Product.price <= filters.max_price)
+
+    if sort_column is Product.id:
+        order_by = [Product.id.desc() if descending else Product.id]
+        key, after_key = Product.id, after[-1] if after is not None else None
+    else:
+        order_by = [sort_column.desc(), Product.id.desc()] if descending else [sort_column, Product.id]
+        key, after_key = tuple_(sort_column, Product.id), tuple_(*after) if after is not None else None
+    query = query.order_by(*order_by)
+
+    if after is not None:
+        query = query.where(key < after_key if descending else key > after_key)
+    else:
+        query = query.offset(skip)
+    result = await db.execute(query)
     return result.scalars().all()
 
+async def search_products(db: AsyncSession, q: str, limit: int = 20, after: tuple[float, int] | None = None):
+    """
+    Busca produtos ativos por nome e descrição, do mais relevante para o menos relevante.
+    No Postgres usa a busca textual (tsvector + índice GIN, ranking com ts_rank_cd);
+    em outros bancos (ex: SQLite local) cai para LIKE, priorizando acertos no nome.
+    Com after=(relevância, id) continua a partir do último resultado da página anterior.
+    Retorna uma lista de tuplas (produto, relevância).
+    """
+    if db.bind.dialect.name == "postgresql":
+        query_vector = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+        match = product_search_vector().op("@@")(query_vector)
+        rank = func.ts_rank_cd(product_search_vector(), query_vector)
+    else:
+        term = q.lower()
+        name_match = func.lower(Product.name).contains(term, autoescape=True)
+        match = or_(name_match, func.lower(Product.description).contains(term, autoescape=True))
+        rank = case((name_match, literal_column("1.0")), else_=literal_column("0.0"))
+
+    rank = rank.label("rank")
+    query = (
+        select(Product, rank)
+        .where(match, Product.is_active.is_(True))
+        .order_by(rank.desc(), Product.id)
+        .limit(limit)
+    )
+    if after is not None:
+        after_rank, after_id = after
+        query = query.where(or_(rank < after_rank, (rank == after_rank) & (Product.id > after_id)))
+    result = await db.execute(query)
+    return result.all()
+
 async def create_product(db: AsyncSession, product: ProductCreate):
     """Cria um novo produto."""
-    db_product = Product(**product.model_dump()) # Cria uma instância do modelo DB a partir do schema
-    db.add(db_product)
+    # INSERT ... RETURNING: o produto volta com o ID gerado, sem precisar de refresh
+    db_product = await db.scalar(insert(Product).values(**product.model_dump()).returning(Product))
     await db.commit()
-    await db.refresh(db_product)
     return db_product
 
+async def upsert_products(db: AsyncSession, products: list[ProductCreate]) -> tuple[int, int]:
+    """
+    Insere ou atualiza (pelo nome, que é único) um lote de produtos com um único
+    INSERT ... ON CONFLICT (name) DO UPDATE de várias linhas, e faz commit.
+    Se o lote tiver nomes repetidos, vale a última ocorrência.
+    Retorna (inseridos, atualizados).
+    """
+    rows = {product.name: product.model_dump() for product in products}
+    if not rows:
+        return 0, 0
+
+    # Descobre quais nomes já existem para separar inserções de atualizações
+    result = await db.execute(select(Product.name).where(Product.name.in_(rows.keys())))
+    existing = len(result.scalars().all())
+
+    dialect_insert = sqlite.insert if db.bind.dialect.name == "sqlite" else postgresql.insert
+    stmt = dialect_insert(Product).values(list(rows.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Product.name],
+        set_={
+            "description": stmt.excluded.description,
+            "price": stmt.excluded.price,
+            "stock": stmt.excluded.stock,
+            "is_active": stmt.excluded.is_active,
+        },
+    )
+    await db.execute(stmt)
+    await db.commit()
+    return len(rows) - existing, existing
+
 async def update_product(db: AsyncSession, product_id: int, product_data: ProductUpdate):
     """Atualiza um produto existente."""
-    db_product = await get_product(db, product_id)
-    if not db_product:
-        return None
-    
     # Atualiza apenas os campos fornecidos no product_data
     update_data = product_data.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_product, key, value)
-    
+    if not update_data:
+        return await get_product(db, product_id)
+
+    # UPDATE ... RETURNING: atualiza e devolve o produto em uma única query
+    db_product = await db.scalar(
+        update(Product).where(Product.id == product_id).values(**update_data).returning(Product)
+    )
+    if not db_product:
+        return None
+
     await db.commit()
-    await db.refresh(db_product)
     return db_product
 
 async def delete_product(db: AsyncSession, product_id: int):
@@ -0,0 +1,182 @@
+# app/crud/sales.py
+
+import random
+from datetime import date
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import Date, delete, func, insert, literal
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.config import settings
+from app.models.order import Order, OrderItem
+from app.models.sales import SalesDaily, ProductSalesDaily
+
+# Os consolidados só contam pedidos que não foram cancelados
+CANCELLED_STATUS = "cancelled"
+
+def _order_day():
+    """Dia do pedido, calculado no banco (date(order_date))."""
+    return func.date(Order.order_date, type_=Date)
+
+async def _upsert(db: AsyncSession, model, key_columns: list[str], rows: list[dict]) -> None:
+    """Soma os valores de rows às linhas existentes (INSERT ... ON CONFLICT DO UPDATE SET x = x + excluded.x)."""
+    if not rows:
+        return
+    dialect_insert = sqlite.insert if db.bind.dialect.name == "sqlite" else postgresql.insert
+    stmt = dialect_insert(model).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={
+            column: getattr(model, column) + getattr(stmt.excluded, column)
+            for column in ("order_count", "units", "revenue")
+        },
+    )
+    await db.execute(stmt)
+
+async def add_order(db: AsyncSession, day: date, items: list, sign: int = 1) -> None:
+    """
+    Aplica um pedido aos consolidados (sem commit, na transação do pedido).
+    items são objetos com product_id, quantity e price_at_purchase.
+    sign=-1 retira o pedido (cancelamento); sign=1 o adiciona.
+    """
+    products = {}
+    for item in items:
+        units, revenue = products.get(item.product_id, (0, 0.0))
+        products[item.product_id] = (units + item.quantity, revenue + item.quantity * item.price_at_purchase)
+
+    await _upsert(db, SalesDaily, ["day", "shard"], [{
+        "day": day,
+        "shard": random.randrange(settings.SALES_ROLLUP_SHARDS),
+        "order_count": sign,
+        "units": sign * sum(units for units, _ in products.values()),
+        "revenue": sign * sum(revenue for _, revenue in products.values()),
+    }])
+    await _upsert(db, ProductSalesDaily, ["day", "product_id"], [
+        {"day": day, "product_id": product_id, "order_count": sign, "units": sign * units, "revenue": sign * revenue}
+        for product_id, (units, revenue) in products.items()
+    ])
+
+async def remove_orders(db: AsyncSession, order_ids: list[int]) -> None:
+    """
+    Retira vários pedidos (ex: cancelamento em lote) dos consolidados, agregando
+    os itens no banco por dia e por dia/produto (sem commit).
+    """
+    if not order_ids:
+        return
+    day = _order_day().label("day")
+    units = func.sum(OrderItem.quantity).label("units")
+    revenue = func.sum(OrderItem.quantity * OrderItem.price_at_purchase).label("revenue")
+    orders = func.count(func.distinct(Order.id)).label("order_count")
+    base = select().select_from(Order).join(OrderItem, OrderItem.order_id == Order.id).where(Order.id.in_(order_ids))
+
+    per_day = await db.execute(base.add_columns(day, orders, units, revenue).group_by(day))
+    await _upsert(db, SalesDaily, ["day", "shard"], [
+        {"day": row.day, "shard": 0, "order_count": -row.order_count, "units": -row.units, "revenue": -row.revenue}
+        for row in per_day.all()
+    ])
+
+    per_product = await db.execute(
+        base.add_columns(day, OrderItem.product_id, orders, units, revenue).group_by(day, OrderItem.product_id)
+    )
+    await _upsert(db, ProductSalesDaily, ["day", "product_id"], [
+        {"day": row.day, "product_id": row.product_id, "order_count": -row.order_count, "units": -row.units, "revenue": -row.revenue}
+        for row in per_product.all()
+    ])
+
+async def rebuild(db: AsyncSession) -> None:
+    """Recalcula os consolidados do zero a partir de orders e order_items, e faz commit."""
+    day = _order_day().label("day")
+    active = Order.status != CANCELLED_STATUS
+
+    await db.execute(delete(ProductSalesDaily))
+    await db.execute(delete(SalesDaily))
+
+    # Pedidos por dia contam também os pedidos sem itens; unidades e receita vêm dos itens
+    item_totals = (
+        select(
+            OrderItem.order_id,
+            func.sum(OrderItem.quantity).label("units"),
+            func.sum(OrderItem.quantity * OrderItem.price_at_purchase).label("revenue"),
+        )
+        .group_by(OrderItem.order_id)
+        .subquery()
+    )
+    await db.execute(
+        insert(SalesDaily).from_select(
+            ["day", "shard", "order_count", "units", "revenue"],
+            select(
+                day,
+                literal(0),
+                func.count(Order.id),
+                func.coalesce(func.sum(item_totals.c.units), 0),
+                func.coalesce(func.sum(item_totals.c.revenue), 0.0),
+            )
+            .select_from(Order)
+            .outerjoin(item_totals, item_totals.c.order_id == Order.id)
+            .where(active)
+            .group_by(day),
+        )
+    )
+    await db.execute(
+        insert(ProductSalesDaily).from_select(
+            ["day", "product_id", "order_count", "units", "revenue"],
+            select(
+                day,
+                OrderItem.product_id,
+                func.count(func.distinct(Order.id)),
+                func.sum(OrderItem.quantity),
+                func.sum(OrderItem.quantity * OrderItem.price_at_purchase),
+            )
+            .select_from(Order)
+            .join(OrderItem, OrderItem.order_id == Order.id)
+            .where(active)
+            .group_by(day, OrderItem.product_id),
+        )
+    )
+    await db.commit()
+
+async def get_daily_sales(db: AsyncSession, date_from: date | None = None, date_to: date | None = None):
+    """Retorna o consolidado por dia no intervalo [date_from, date_to], em ordem cronológica."""
+    query = (
+        select(
+            SalesDaily.day,
+            func.sum(SalesDaily.order_count).label("order_count"),
+            func.sum(SalesDaily.units).label("units"),
+            func.sum(SalesDaily.revenue).label("revenue"),
+        )
+        .group_by(SalesDaily.day)
+        .order_by(SalesDaily.day)
+    )
+    if date_from is not None:
+        query = query.where(SalesDaily.day >= date_from)
+    if date_to is not None:
+        query = query.where(SalesDaily.day <= date_to)
+    result = await db.execute(query)
+    return result.all()
+
+async def get_top_products(
+    db: AsyncSession,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    limit: int = 10,
+    order_by: str = "revenue",
+):
+    """Retorna os produtos mais vendidos no intervalo, somando o consolidado por dia/produto."""
+    totals = {
+        "order_count": func.sum(ProductSalesDaily.order_count).label("order_count"),
+        "units": func.sum(ProductSalesDaily.units).label("units"),
+        "revenue": func.sum(ProductSalesDaily.revenue).label("revenue"),
+    }
+    query = (
+        select(ProductSalesDaily.product_id, *totals.values())
+        .group_by(ProductSalesDaily.product_id)
+        .order_by(totals[order_by].desc(), ProductSalesDaily.product_id)
+        .limit(limit)
+    )
+    if date_from is not None:
+        query = query.where(ProductSalesDaily.day >= date_from)
+    if date_to is not None:
+        query = query.where(ProductSalesDaily.day <= date_to)
+    result = await db.execute(query)
+    return result.all()
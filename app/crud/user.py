@@ -1,22 +1,9 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import delete
+from sqlalchemy import delete, insert, update
 from app.models.user import User
 from app.schemas.user import UserCreate
-from passlib.context import CryptContext # Para hash de senhas
-
-# Inicializa o contexto para hashing de senhas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-# --- Funções Auxiliares de Senha ---
-def get_password_hash(password: str) -> str:
-    """Hashea a senha fornecida."""
-    return pwd_context.hash(password)
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verifica se a senha simples corresponde à senha hash."""
-    return pwd_context.verify(plain_password, hashed_password)
-
+from app.services import auth_service # Hash de senhas e cache de versões de token
 # --- Funções CRUD para Usuários ---
 
 async def get_user(db: AsyncSession, user_id: int):
@@ -34,22 +21,36 @@ async def get_user_by_email(db: AsyncSession, email: str):
     result = await db.execute(select(User).where(User.email == email))
     return result.scalar_one_or_none() # Retorna o primeiro resultado ou None
 
-async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100):
+async def get_user_token_version(db: AsyncSession, user_id: int) -> int | None:
+    """
+    Retorna apenas a versão de token do usuário (ou None se ele não existir).
+    """
+    result = await db.execute(select(User.token_version).where(User.id == user_id))
+    return result.scalar_one_or_none()
+
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100, after_id: int | None = None):
     """
-    Retorna uma lista de usuários com paginação.
+    Retorna uma lista de usuários com paginação, ordenada por ID.
+    Se after_id for informado, usa paginação por chave (keyset) a partir desse ID em vez de OFFSET.
     """
-    result = await db.execute(select(User).offset(skip).limit(limit))
+    query = select(User).order_by(User.id).limit(limit)
+    if after_id is not None:
+        query = query.where(User.id > after_id)
+    else:
+        query = query.offset(skip)
+    result = await db.execute(query)
     return result.scalars().all() # Retorna todos os resultados da query
 
 async def create_user(db: AsyncSession, user: UserCreate):
     """
     Cria um novo usuário no banco de dados.
     """
-    hashed_password = get_password_hash(user.password) # Hasheia a senha antes de salvar
-    db_user = User(email=user.email, hashed_password=hashed_password) # Cria uma instância do modelo DB
-    db.add(db_user) # Adiciona o objeto ao sessão do DB
+    hashed_password = await auth_service.hash_password(user.password) # Hasheia a senha (fora do event loop) antes de salvar
+    # INSERT ... RETURNING: o usuário volta com o ID e os valores padrão gerados pelo DB
+    db_user = await db.scalar(
+        insert(User).values(email=user.email, hashed_password=hashed_password).returning(User)
+    )
     await db.commit() # Salva as mudanças no DB
-    await db.refresh(db_user) # Atualiza o objeto com os dados do DB (ex: ID gerado)
     return db_user
 
 async def update_user(db: AsyncSession, user_id: int, user_update_data: dict):
@@ -57,20 +58,33 @@ async def update_user(db: AsyncSession, user_id: int, user_update_data: dict):
     Atualiza um usuário existente.
     user_update_data é um dicionário com os campos a serem atualizados.
     """
-    db_user = await get_user(db, user_id)
-    if not db_user:
-        return None
-
+    values = {}
     for key, value in user_update_data.items():
         if key == "password": # Se a senha for atualizada, hasheie
-            setattr(db_user, "hashed_password", get_password_hash(value))
+            values["hashed_password"] = await auth_service.hash_password(value)
         else:
-            setattr(db_user, key, value)
-    
+            values[key] = value
+
+    # Qualquer alteração invalida os tokens já emitidos, pois as claims podem ter mudado
+    values["token_version"] = User.token_version + 1
+
+    # UPDATE ... RETURNING: atualiza e devolve o usuário em uma única query
+    db_user = await db.scalar(update(User).where(User.id == user_id).values(**values).returning(User))
+    if not db_user:
+        return None
+
     await db.commit()
-    await db.refresh(db_user)
+    auth_service.cache_token_version(db_user.id, db_user.token_version)
     return db_user
 
+async def update_password_hash(db: AsyncSession, user_id: int, hashed_password: str):
+    """
+    Substitui o hash de senha de um usuário (ex: rehash com novo custo no login).
+    Não altera a versão do token, pois as claims continuam as mesmas.
+    """
+    await db.execute(update(User).where(User.id == user_id).values(hashed_password=hashed_password))
+    await db.commit()
+
 async def delete_user(db: AsyncSession, user_id: int):
     """
     Deleta um usuário pelo ID.
@@ -81,5 +95,7 @@ async def delete_user(db: AsyncSession, user_id: int):
     result = await db.execute(stmt)
     # Commit para persistir a mudança
     await db.commit()
+    # Os tokens do usuário removido deixam de valer imediatamente neste processo
+    auth_service.revoke_user_tokens(user_id)
     # Retorna o número de linhas afetadas (0 ou 1)
     return result.rowcount > 0
\ No newline at end of file
@@ -1,13 +1,114 @@
+import asyncio
+import time
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import declarative_base, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings # Importa as configurações que acabamos de criar
+from app.services import query_monitor # Temporização de statements e log de queries lentas
+from app.services import replica_routing # Escolha entre réplica e primário nas leituras
 
 # A URL de conexão é carregada das configurações
 DATABASE_URL = settings.DATABASE_URL
 
+# Limites (em segundos) dos buckets do histograma de espera por conexão
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, float("inf"))
+
+# Estatísticas acumuladas de espera por conexão do pool
+_pool_wait = {"count": 0, "sum": 0.0, "max": 0.0, "buckets": [0] * len(POOL_WAIT_BUCKETS)}
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Pool padrão do engine assíncrono que mede quanto tempo cada checkout esperou
+    por uma conexão livre (saturação do pool aparece aqui antes de virar latência).
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            _observe_pool_wait(time.perf_counter() - start)
+
+def _observe_pool_wait(seconds: float) -> None:
+    _pool_wait["count"] += 1
+    _pool_wait["sum"] += seconds
+    _pool_wait["max"] = max(_pool_wait["max"], seconds)
+    for index, limit in enumerate(POOL_WAIT_BUCKETS):
+        if seconds <= limit:
+            _pool_wait["buckets"][index] += 1
+            break
+
+def _connect_args(url: str = DATABASE_URL) -> dict:
+    """Argumentos de conexão específicos do driver (cache de prepared statements do asyncpg)."""
+    if make_url(url).get_driver_name() != "asyncpg":
+        return {}
+    return {
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE, # Cache do SQLAlchemy
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE, # Cache do próprio asyncpg
+    }
+
 # Cria o engine assíncrono do SQLAlchemy
-# O 'echo=True' é útil para depuração, mostrando as queries SQL no console
-engine = create_async_engine(DATABASE_URL, echo=True)
+# DB_ECHO=true mostra todas as queries SQL no console (útil só para depuração);
+# em produção o query_monitor registra apenas as queries lentas
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=settings.DB_ECHO,
+    poolclass=InstrumentedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args=_connect_args(),
+)
+
+# Temporiza cada statement: log de queries lentas, estatísticas agregadas e
+# queries/tempo de banco por requisição nas métricas de /metrics
+query_monitor.install(engine)
+
+# Engine opcional da réplica de leitura, com a mesma configuração de pool do primário
+replica_engine = None
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_async_engine(
+        settings.DATABASE_REPLICA_URL,
+        echo=settings.DB_ECHO,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=_connect_args(settings.DATABASE_REPLICA_URL),
+    )
+    query_monitor.install(replica_engine)
+
+def get_pool_stats() -> dict:
+    """
+    Retorna o estado atual do pool deste worker (conexões em uso, livres, overflow)
+    e o histograma acumulado do tempo de espera por uma conexão.
+    """
+    pool = engine.sync_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "wait_seconds": {
+            "count": _pool_wait["count"],
+            "sum": _pool_wait["sum"],
+            "max": _pool_wait["max"],
+            "buckets": {
+                ("+Inf" if limit == float("inf") else str(limit)): count
+                for limit, count in zip(POOL_WAIT_BUCKETS, _pool_wait["buckets"])
+            },
+        },
+    }
 
 # Cria um construtor de sessões assíncronas.
 # expire_on_commit=False: Evita que objetos fiquem "desanexados" após o commit.
@@ -20,11 +121,50 @@ async_session_maker = async_sessionmaker(
     expire_on_commit=False
 )
 
+replica_session_maker = None
+if replica_engine is not None:
+    replica_session_maker = async_sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=replica_engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+
+@event.listens_for(Session, "after_commit")
+def _mark_primary_write(session):
+    # Commits no primário abrem a janela de read-your-writes do cliente
+    if session.bind is engine.sync_engine:
+        replica_routing.mark_write()
+
 # Base para nossos modelos declarativos do SQLAlchemy
 Base = declarative_base()
 
+# Estratégia de carregamento dos relacionamentos dos modelos. Com RAISE_ON_LAZY_LOAD,
+# acessar um relacionamento que não foi carregado antes levanta erro na hora, em vez
+# de tentar I/O escondido (que no código assíncrono falha longe da causa)
+LAZY_LOAD = "raise_on_sql" if settings.RAISE_ON_LAZY_LOAD else "select"
+
 # Função assíncrona para obter uma sessão de banco de dados.
 # Esta função será usada como uma dependência no FastAPI.
 async def get_db():
+    async with async_session_maker() as session:
+        yield session
+
+# Dependência das rotas somente leitura (GET): usa a réplica quando configurada,
+# acessível, dentro do atraso tolerado e fora da janela de read-your-writes do cliente;
+# nos demais casos, o primário.
+async def get_read_db(request: Request):
+    if replica_session_maker is not None and replica_routing.use_replica(request):
+        async with replica_session_maker() as session:
+            try:
+                await session.connection() # Conecta já, para cair no primário se a réplica falhar
+            except (DBAPIError, PoolTimeoutError, asyncio.TimeoutError, OSError):
+                # Erro do driver, pool esgotado ou conexão que não respondeu a tempo
+                replica_routing.mark_unavailable()
+            else:
+                session.info["replica"] = True # Consultado por replica_routing.is_replica
+                yield session
+                return
     async with async_session_maker() as session:
         yield session
\ No newline at end of file
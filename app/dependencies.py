@@ -19,7 +19,9 @@ async def get_current_user(
 ) -> User:
     """
     Dependência que retorna o usuário atualmente autenticado.
-    Se o token for inválido ou o usuário não for encontrado, levanta uma HTTPException.
+    O usuário é montado a partir das claims do token; o banco só é consultado para
+    conferir a versão do token quando ela não está no cache em processo.
+    Se o token for inválido, revogado ou o usuário não for encontrado, levanta uma HTTPException.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -27,15 +29,35 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    # Verifica e decodifica o token para obter os dados (email)
+    # Verifica e decodifica o token para obter os dados (email e claims)
     token_data = auth_service.verify_access_token(token, credentials_exception)
-    
-    # Busca o usuário no banco de dados usando o email do token
-    user = await crud_user.get_user_by_email(db, email=token_data.email)
-    if user is None:
-        raise credentials_exception # Usuário não encontrado, mesmo com token válido
-    
-    return user
+
+    if token_data.user_id is None or token_data.token_version is None:
+        # Token antigo, sem claims: busca o usuário no banco usando o email do token
+        user = await crud_user.get_user_by_email(db, email=token_data.email)
+        if user is None:
+            raise credentials_exception # Usuário não encontrado, mesmo com token válido
+        return user
+
+    # Confere se o token não foi revogado; o banco só é consultado quando a versão não está em cache
+    current_version = auth_service.get_cached_token_version(token_data.user_id)
+    if current_version is None:
+        current_version = await crud_user.get_user_token_version(db, token_data.user_id)
+        if current_version is None:
+            current_version = auth_service.REVOKED_TOKEN_VERSION
+        auth_service.cache_token_version(token_data.user_id, current_version)
+
+    if current_version != token_data.token_version:
+        raise credentials_exception # Usuário removido ou alterado depois da emissão do token
+
+    # Monta o usuário a partir das claims, sem carregar a linha da tabela users
+    return User(
+        id=token_data.user_id,
+        email=token_data.email,
+        is_active=token_data.is_active,
+        is_admin=token_data.is_admin,
+        token_version=token_data.token_version,
+    )
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """
@@ -1,16 +1,28 @@
 # app/main.py
 
 from fastapi import FastAPI
-from app.database import engine, Base
+from app import migrations
+from app.services import product_autocomplete
+from app.services import idempotency_service
+from app.config import settings
+from app.middleware import RequestContextMiddleware, MetricsMiddleware, ReadYourWritesMiddleware
+from app.database import engine, replica_engine
+from app.services import replica_routing
 import asyncio
 from app.models import user
 from app.models import product
 from app.models import order
+from app.models import idempotency
+from app.models import sales
+from app.models import order_summary
 
 from app.routers import users
 from app.routers import auth
 from app.routers import products
 from app.routers import orders # <--- ADICIONE ESTA LINHA para o roteador de pedidos
+from app.routers import monitoring
+from app.routers import analytics
+from app.routers import metrics
 
 # Cria uma instância da aplicação FastAPI
 app = FastAPI(
@@ -19,19 +31,63 @@ app = FastAPI(
     version="0.1.0",
 )
 
+# Disponibiliza a rota da requisição em andamento (usada no log de queries lentas)
+app.add_middleware(RequestContextMiddleware)
+
+# Com réplica de leitura, mantém no primário as leituras de quem acabou de escrever
+if replica_engine is not None:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# Latência, status e uso de banco por rota, exportados em /metrics
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Inclui os roteadores na aplicação principal
 app.include_router(users.router)
 app.include_router(auth.router)
 app.include_router(products.router)
 app.include_router(orders.router) # <--- ADICIONE ESTA LINHA
+app.include_router(monitoring.router)
+app.include_router(analytics.router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
 
-# Evento de startup para criar as tabelas no banco de dados
+# Evento de startup: confere a versão do schema (as migrações rodam à parte,
+# com `python -m app.migrations`, uma vez por deploy)
 @app.on_event("startup")
 async def startup_event():
-    print("Iniciando a criação das tabelas no banco de dados...")
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    print("Tabelas criadas ou já existentes.")
+    version = await migrations.check_schema()
+    print(f"Schema do banco na versão {version}.")
+
+    # Carrega o índice do autocomplete de produtos e agenda as recargas periódicas
+    await product_autocomplete.reload()
+    if settings.PRODUCT_AUTOCOMPLETE_REFRESH_SECONDS > 0:
+        app.state.autocomplete_refresh = asyncio.create_task(product_autocomplete.refresh_periodically())
+
+    # Acompanha o atraso da réplica de leitura (acima do tolerado, as leituras vão ao primário)
+    if replica_engine is not None:
+        app.state.replica_monitor = asyncio.create_task(replica_routing.monitor_periodically(replica_engine))
+
+    # Limpeza em lote das chaves de idempotência expiradas
+    if settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS > 0:
+        app.state.idempotency_purge = asyncio.create_task(idempotency_service.purge_periodically())
+
+# Tarefas periódicas criadas no startup (atributos de app.state)
+BACKGROUND_TASKS = ("autocomplete_refresh", "replica_monitor", "idempotency_purge")
+
+# Evento de shutdown: encerra as tarefas periódicas e fecha as conexões dos pools
+@app.on_event("shutdown")
+async def shutdown_event():
+    tasks = [task for name in BACKGROUND_TASKS if (task := getattr(app.state, name, None)) is not None]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    for name in BACKGROUND_TASKS:
+        setattr(app.state, name, None)
+
+    await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,114 @@
+# app/middleware.py
+
+import time
+from contextvars import ContextVar
+
+from app.services import metrics
+from app.services import query_budget
+from app.services import replica_routing
+
+# Escopo ASGI da requisição em andamento. O roteamento do FastAPI grava a rota
+# encontrada nesse mesmo dicionário, então o template da rota fica disponível
+# para qualquer código que rode dentro do endpoint (ex: hooks do SQLAlchemy).
+_current_scope: ContextVar[dict | None] = ContextVar("current_scope", default=None)
+
+def current_route() -> str | None:
+    """
+    Retorna "MÉTODO /template/da/rota" da requisição em andamento
+    (ou o caminho bruto, se a rota ainda não foi resolvida). None fora de requisições.
+    """
+    scope = _current_scope.get()
+    if scope is None:
+        return None
+    path = _route_template(scope) or scope.get("path", "")
+    return f"{scope.get('method', '')} {path}"
+
+def _route_template(scope: dict) -> str | None:
+    """Template da rota resolvida pelo roteamento (ex: /orders/{order_id}), se houver."""
+    return getattr(scope.get("route"), "path", None)
+
+class RequestContextMiddleware:
+    """
+    Middleware ASGI que disponibiliza o escopo da requisição via current_route()
+    e rastreia os statements da requisição para o orçamento de queries.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current_scope.set(scope)
+        if not query_budget.enabled():
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                _current_scope.reset(token)
+            return
+
+        # Conta os statements da requisição para o orçamento de queries e a detecção de N+1
+        tracker, budget_token = query_budget.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            query_budget.finish(tracker, budget_token, label=current_route())
+            _current_scope.reset(token)
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que registra, por template de rota, latência, status, requisições
+    em andamento e uso de banco (queries e tempo) no registro de app/services/metrics.py.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500 # Se a aplicação falhar antes de responder
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats, token = metrics.start_request(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.finish_request(method, _route_template(scope), status_code, time.perf_counter() - start, stats, token)
+
+class ReadYourWritesMiddleware:
+    """
+    Middleware ASGI que, quando a requisição faz commit no primário, envia o cookie
+    que mantém as leituras seguintes do cliente no primário (ver replica_routing).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        wrote, token = replica_routing.start_request()
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and wrote[0]:
+                headers = [*message.get("headers", []), (b"set-cookie", replica_routing.read_primary_cookie())]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            replica_routing.finish_request(token)
@@ -0,0 +1,71 @@
+# app/migrations/__init__.py
+#
+# Migrações versionadas do schema. A tabela schema_version guarda uma linha por versão
+# aplicada. As migrações rodam só pelo comando `python -m app.migrations` (uma vez por
+# deploy, antes de subir os workers); no startup cada worker apenas confere a versão
+# com uma query, sem introspecção do catálogo.
+
+from sqlalchemy import Column, DateTime, Integer, String, Table, func, insert, select, text
+from sqlalchemy.exc import DBAPIError
+
+from app.database import Base, engine
+from app.migrations.versions import MIGRATIONS
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+# Chave do advisory lock do Postgres que serializa execuções concorrentes do comando
+_MIGRATION_LOCK_KEY = 7_405_001
+
+schema_version = Table(
+    "schema_version",
+    Base.metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, server_default=func.now(), nullable=False),
+)
+
+async def current_version(conn) -> int:
+    """Última versão aplicada (0 se nenhuma)."""
+    return await conn.scalar(select(func.max(schema_version.c.version))) or 0
+
+async def check_schema() -> int:
+    """
+    Confere (uma query) se o banco está na versão que este código espera e retorna a versão.
+    Um schema mais novo é aceito, para deploys graduais em que workers antigos
+    ainda rodam depois da migração; um schema mais antigo impede o startup.
+    """
+    try:
+        async with engine.connect() as conn:
+            version = await current_version(conn)
+    except DBAPIError as exc:
+        raise RuntimeError(
+            "Não foi possível ler a versão do schema (banco inacessível ou migrações nunca aplicadas). "
+            "Rode: python -m app.migrations"
+        ) from exc
+    if version < LATEST_VERSION:
+        raise RuntimeError(
+            f"Schema do banco na versão {version}, mas o código requer a versão {LATEST_VERSION}. "
+            "Rode: python -m app.migrations"
+        )
+    return version
+
+async def migrate(target: int | None = None) -> list[int]:
+    """
+    Aplica as migrações pendentes até target (ou até a última) e retorna as versões aplicadas.
+    Cada migração roda em sua própria transação, junto com o registro da versão.
+    """
+    applied = []
+    for version, description, upgrade in MIGRATIONS:
+        if target is not None and version > target:
+            break
+        async with engine.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                # Outra execução simultânea do comando espera aqui e depois vê a versão já aplicada
+                await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _MIGRATION_LOCK_KEY})
+            await conn.run_sync(lambda sync_conn: schema_version.create(sync_conn, checkfirst=True))
+            if version <= await current_version(conn):
+                continue
+            await upgrade(conn)
+            await conn.execute(insert(schema_version).values(version=version, description=description))
+        applied.append(version)
+    return applied
@@ -0,0 +1,40 @@
+# app/migrations/__main__.py
+#
+# Aplica as migrações pendentes do schema.
+# Uso: python -m app.migrations [--target N] [--status]
+
+import argparse
+import asyncio
+
+from sqlalchemy.exc import DBAPIError
+
+from app.database import engine
+from app.migrations import LATEST_VERSION, MIGRATIONS, current_version, migrate
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target", type=int, help="para na versão indicada")
+    parser.add_argument("--status", action="store_true", help="só mostra a versão atual do banco")
+    args = parser.parse_args()
+
+    try:
+        if args.status:
+            try:
+                async with engine.connect() as conn:
+                    version = await current_version(conn)
+            except DBAPIError:
+                version = 0 # Tabela schema_version ainda não existe
+            print(f"Schema na versão {version} (última disponível: {LATEST_VERSION}).")
+            return
+
+        applied = await migrate(args.target)
+    finally:
+        await engine.dispose()
+
+    descriptions = {version: description for version, description, _ in MIGRATIONS}
+    for version in applied:
+        print(f"  {version}: {descriptions[version]}")
+    print(f"{len(applied)} migração(ões) aplicada(s)." if applied else "Schema já está atualizado.")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+# app/migrations/versions.py
+#
+# Migrações do schema, em ordem. Cada uma recebe a conexão (já em transação, com o
+# lock das migrações) e é idempotente: bancos criados pelo antigo create_all do startup
+# já podem ter parte do que ela cria, então tabelas, colunas e índices só são criados
+# se ainda não existirem. Nunca altere uma migração já publicada; mudanças novas no
+# schema entram como uma versão nova no fim de MIGRATIONS.
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.schema import CreateColumn
+
+from app.crud import sales as crud_sales
+from app.crud import order_summary as crud_order_summary
+from app.models.user import User
+from app.models.product import Product
+from app.models.order import Order, OrderItem
+from app.models.idempotency import IdempotencyKey
+from app.models.sales import SalesDaily, ProductSalesDaily
+from app.models.order_summary import UserOrderSummary
+
+# --- Operações idempotentes (síncronas, via conn.run_sync) ---
+
+def _create_tables(sync_conn, *tables) -> None:
+    for table in tables:
+        table.create(sync_conn, checkfirst=True) # Cria também os índices declarados na tabela
+
+def _add_column(sync_conn, column) -> None:
+    table = column.table
+    existing = {col["name"] for col in inspect(sync_conn).get_columns(table.name)}
+    if column.name not in existing:
+        ddl = CreateColumn(column).compile(dialect=sync_conn.dialect)
+        sync_conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {ddl}")
+
+def _create_indexes(sync_conn, table, *names: str) -> None:
+    existing = {index["name"] for index in inspect(sync_conn).get_indexes(table.name)}
+    indexes = {index.name: index for index in table.indexes}
+    for name in names:
+        if name not in existing:
+            indexes[name].create(sync_conn)
+
+async def _rebuild(conn: AsyncConnection, rebuild) -> None:
+    """Roda uma recarga de consolidados na transação da migração (o commit da sessão não encerra a transação)."""
+    await rebuild(AsyncSession(bind=conn))
+
+# --- Migrações ---
+
+async def initial_tables(conn: AsyncConnection) -> None:
+    await conn.run_sync(_create_tables, User.__table__, Product.__table__, Order.__table__, OrderItem.__table__)
+
+async def user_token_version(conn: AsyncConnection) -> None:
+    await conn.run_sync(_add_column, User.__table__.c.token_version)
+
+async def listing_indexes(conn: AsyncConnection) -> None:
+    await conn.run_sync(_create_indexes, Order.__table__, "ix_orders_user_id_order_date_id", "ix_orders_order_date_id")
+    await conn.run_sync(
+        _create_indexes, Product.__table__,
+        "ix_products_price_id", "ix_products_active_id", "ix_products_active_price_id", "ix_products_active_name_id",
+    )
+    if conn.dialect.name == "postgresql":
+        await conn.run_sync(_create_indexes, Product.__table__, "ix_products_search") # GIN da busca textual
+
+async def idempotency_keys(conn: AsyncConnection) -> None:
+    await conn.run_sync(_create_tables, IdempotencyKey.__table__)
+
+async def sales_rollups(conn: AsyncConnection) -> None:
+    await conn.run_sync(_create_tables, SalesDaily.__table__, ProductSalesDaily.__table__)
+    await _rebuild(conn, crud_sales.rebuild) # Carga inicial a partir dos pedidos existentes
+
+async def user_order_summaries(conn: AsyncConnection) -> None:
+    await conn.run_sync(_create_tables, UserOrderSummary.__table__)
+    await _rebuild(conn, crud_order_summary.rebuild)
+
+async def idempotency_request_hash(conn: AsyncConnection) -> None:
+    await conn.run_sync(_add_column, IdempotencyKey.__table__.c.request_hash)
+
+# (versão, descrição, função). As versões são sequenciais a partir de 1.
+MIGRATIONS = [
+    (1, "Tabelas iniciais: users, products, orders, order_items", initial_tables),
+    (2, "users.token_version (revogação de tokens)", user_token_version),
+    (3, "Índices das listagens de pedidos e produtos e da busca textual", listing_indexes),
+    (4, "Tabela idempotency_keys", idempotency_keys),
+    (5, "Consolidados de vendas (sales_daily, product_sales_daily)", sales_rollups),
+    (6, "Resumo de pedidos por usuário (user_order_summaries)", user_order_summaries),
+    (7, "idempotency_keys.request_hash (corpo da requisição que reservou a chave)", idempotency_request_hash),
+]
@@ -0,0 +1,22 @@
+# app/models/idempotency.py
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func # Para funções como now()
+from app.database import Base
+
+# Modelo para as chaves de idempotência de criação de pedidos (cabeçalho Idempotency-Key)
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    key = Column(String(255), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=True) # Pedido criado com esta chave
+    response = Column(Text, nullable=True) # OrderResponse serializado, devolvido nas repetições
+    request_hash = Column(String(64), nullable=True) # SHA-256 do corpo da requisição que reservou a chave
+    created_at = Column(DateTime, default=func.now(), nullable=False, index=True) # Usado na limpeza das expiradas
+
+    # A mesma chave só vale uma vez por usuário
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_id_key"),
+    )
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func # Para funções como now()
-from app.database import Base
+from app.database import Base, LAZY_LOAD
 
 # Modelo para o Pedido (Order)
 class Order(Base):
@@ -13,11 +13,17 @@ class Order(Base):
     total_amount = Column(Float, nullable=False)
     status = Column(String, default="pending", nullable=False) # Ex: pending, processing, shipped, delivered, cancelled
 
+    # Índices para a paginação por chave (order_date, id) das listagens de pedidos
+    __table_args__ = (
+        Index("ix_orders_user_id_order_date_id", user_id, order_date.desc(), id.desc()),
+        Index("ix_orders_order_date_id", order_date.desc(), id.desc()),
+    )
+
     # Relacionamentos
     # Cada pedido pertence a um usuário
-    user = relationship("User", back_populates="orders")
+    user = relationship("User", back_populates="orders", lazy=LAZY_LOAD)
     # Cada pedido pode ter múltiplos itens (produtos)
-    items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
+    items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan", lazy=LAZY_LOAD)
 
 # Modelo para o Item de Pedido (OrderItem) - os produtos dentro de um pedido
 class OrderItem(Base):
@@ -31,6 +37,6 @@ class OrderItem(Base):
 
     # Relacionamentos
     # Cada item pertence a um pedido
-    order = relationship("Order", back_populates="items")
+    order = relationship("Order", back_populates="items", lazy=LAZY_LOAD)
     # Cada item se refere a um produto
-    product = relationship("Product") # Não usamos back_populates aqui, pois um produto pode estar em muitos order_items
\ No newline at end of file
+    product = relationship("Product", lazy=LAZY_LOAD) # Não usamos back_populates aqui, pois um produto pode estar em muitos order_items
\ No newline at end of file
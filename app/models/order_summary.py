@@ -0,0 +1,14 @@
+# app/models/order_summary.py
+
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from app.database import Base
+
+# Resumo dos pedidos de cada usuário (pedidos não cancelados), mantido junto com os pedidos
+# para que a página da conta seja uma leitura por chave primária
+class UserOrderSummary(Base):
+    __tablename__ = "user_order_summaries"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    order_count = Column(Integer, nullable=False, default=0)
+    lifetime_spend = Column(Float, nullable=False, default=0.0) # Soma de total_amount
+    last_order_date = Column(DateTime, nullable=True) # Data do pedido mais recente
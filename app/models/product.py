@@ -1,6 +1,6 @@
 # app/models/product.py
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, Text, Index, func, literal_column
 from app.database import Base # Importa a base declarativa do SQLAlchemy
 
 class Product(Base):
@@ -11,4 +11,32 @@ class Product(Base):
     description = Column(Text, nullable=True) # Text para descrições mais longas
     price = Column(Float, nullable=False)
     stock = Column(Integer, nullable=False, default=0) # Quantidade em estoque
-    is_active = Column(Boolean, default=True) # Se o produto está ativo/visível
\ No newline at end of file
+    is_active = Column(Boolean, default=True) # Se o produto está ativo/visível
+
+    # Índices da listagem filtrada/ordenada. Os parciais cobrem a vitrine (só ativos),
+    # que é o caso mais comum; o de preço completo atende a listagem do admin.
+    __table_args__ = (
+        Index("ix_products_price_id", price, id),
+        Index("ix_products_active_id", id, postgresql_where=is_active.is_(True), sqlite_where=is_active.is_(True)),
+        Index("ix_products_active_price_id", price, id, postgresql_where=is_active.is_(True), sqlite_where=is_active.is_(True)),
+        Index("ix_products_active_name_id", name, id, postgresql_where=is_active.is_(True), sqlite_where=is_active.is_(True)),
+    )
+
+# Configuração de idioma da busca textual do Postgres (stemming em português)
+SEARCH_CONFIG = literal_column("'portuguese'::regconfig")
+
+def product_search_vector():
+    """
+    tsvector da busca de produtos: nome com peso A e descrição com peso B.
+    Só usa constantes literais (sem parâmetros), para que a expressão da query
+    seja idêntica à do índice GIN e o Postgres consiga usá-lo.
+    """
+    name_vector = func.setweight(func.to_tsvector(SEARCH_CONFIG, Product.name), literal_column("'A'"))
+    description_vector = func.setweight(
+        func.to_tsvector(SEARCH_CONFIG, func.coalesce(Product.description, literal_column("''"))),
+        literal_column("'B'"),
+    )
+    return name_vector.op("||")(description_vector)
+
+# Índice GIN da busca textual (só existe no Postgres; no SQLite a busca usa LIKE)
+Index("ix_products_search", product_search_vector(), postgresql_using="gin").ddl_if(dialect="postgresql")
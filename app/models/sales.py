@@ -0,0 +1,27 @@
+# app/models/sales.py
+
+from sqlalchemy import Column, Integer, Float, Date, ForeignKey
+from app.database import Base
+
+# Consolidado de vendas por dia (pedidos não cancelados), mantido incrementalmente.
+# Cada dia é dividido em várias linhas (shard): todo checkout do dia atualiza este
+# consolidado, e espalhar as atualizações evita que todos disputem a mesma linha.
+# Os relatórios somam os shards do dia.
+class SalesDaily(Base):
+    __tablename__ = "sales_daily"
+
+    day = Column(Date, primary_key=True)
+    shard = Column(Integer, primary_key=True, default=0)
+    order_count = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0) # Soma de quantity * price_at_purchase
+
+# Consolidado de vendas por dia e produto (base do ranking de mais vendidos)
+class ProductSalesDaily(Base):
+    __tablename__ = "product_sales_daily"
+
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True, index=True)
+    order_count = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
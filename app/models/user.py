@@ -1,6 +1,6 @@
 from sqlalchemy import Column, Integer, String, Boolean
 from sqlalchemy.orm import relationship
-from app.database import Base # Importa a Base que definimos em database.py
+from app.database import Base, LAZY_LOAD # Importa a Base que definimos em database.py
 
 class User(Base):
     __tablename__ = "users" # Define o nome da tabela no banco de dados
@@ -10,8 +10,9 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True) # Para ativar/desativar usuários
     is_admin = Column(Boolean, default=False) # Para controle de permissões (opcional)
+    token_version = Column(Integer, default=0, server_default="0", nullable=False) # Incrementada para invalidar tokens já emitidos
 
-    orders = relationship("Order", back_populates="user")
+    orders = relationship("Order", back_populates="user", lazy=LAZY_LOAD)
 
     def __repr__(self):
         return f"<User(id={self.id}, email='{self.email}')>"
\ No newline at end of file
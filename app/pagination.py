@@ -0,0 +1,48 @@
+# app/pagination.py
+
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, Response, status
+
+# Cabeçalho em que as listagens devolvem o cursor da próxima página
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(*values) -> str:
+    """
+    Codifica a chave da última linha de uma página em um cursor opaco (base64 de um JSON).
+    Datas são serializadas em ISO 8601.
+    """
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """
+    Decodifica um cursor gerado por encode_cursor, convertendo cada valor para o tipo
+    informado (ex: decode_cursor(cursor, datetime, int)).
+    Levanta HTTPException 400 se o cursor for inválido.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError(cursor)
+        return tuple(
+            datetime.fromisoformat(value) if type_ is datetime else type_(value)
+            for type_, value in zip(types, payload)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginação inválido."
+        )
+
+def set_next_cursor(response: Response, items, limit: int, key) -> None:
+    """
+    Se a página veio cheia, grava no cabeçalho X-Next-Cursor o cursor da próxima página,
+    calculado a partir da chave (key) do último item.
+    """
+    if items and len(items) >= limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*key(items[-1]))
@@ -0,0 +1,60 @@
+# app/routers/analytics.py
+
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal
+from datetime import date
+
+from app.database import get_db, get_read_db
+from app.schemas.analytics import DailySalesResponse, ProductSalesResponse
+from app.crud import sales as crud_sales
+from app.crud import order_summary as crud_order_summary
+from app.dependencies import get_current_admin_user
+from app.models.user import User # Para tipagem do current_user
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["Analytics"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.get("/sales/daily", response_model=List[DailySalesResponse])
+async def read_daily_sales(
+    date_from: date | None = None,
+    date_to: date | None = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_user) # Somente admin pode ver os relatórios
+):
+    """
+    Retorna pedidos, unidades e receita por dia no intervalo [date_from, date_to].
+    Lê dos consolidados, não das tabelas de pedidos. Requer privilégios de administrador.
+    """
+    return await crud_sales.get_daily_sales(db, date_from=date_from, date_to=date_to)
+
+@router.get("/products/top", response_model=List[ProductSalesResponse])
+async def read_top_products(
+    date_from: date | None = None,
+    date_to: date | None = None,
+    limit: int = Query(10, ge=1, le=100),
+    order_by: Literal["revenue", "units", "order_count"] = "revenue",
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_user) # Somente admin pode ver os relatórios
+):
+    """
+    Retorna os produtos mais vendidos no intervalo, por receita, unidades ou número de pedidos.
+    Lê dos consolidados, não das tabelas de pedidos. Requer privilégios de administrador.
+    """
+    return await crud_sales.get_top_products(db, date_from=date_from, date_to=date_to, limit=limit, order_by=order_by)
+
+@router.post("/rebuild", status_code=status.HTTP_204_NO_CONTENT)
+async def rebuild_sales_rollups(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user) # Somente admin pode recalcular os consolidados
+):
+    """
+    Recalcula do zero, a partir dos pedidos, os consolidados de vendas e os resumos
+    de pedidos por usuário. Requer privilégios de administrador.
+    """
+    await crud_sales.rebuild(db)
+    await crud_order_summary.rebuild(db)
+    return
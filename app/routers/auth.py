@@ -4,11 +4,13 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm # Para o formulário de login
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.schemas.token import Token # Schema para o token de resposta
-from app.schemas.user import UserResponse # <--- ADICIONE ESTA LINHA!
+from app.schemas.user import UserResponse, UserOrderSummaryResponse # <--- ADICIONE ESTA LINHA!
 from app.crud import user as crud_user
+from app.crud import order_summary as crud_order_summary
 from app.services import auth_service # Para criar tokens e verificar senhas
+from app.services import query_budget # Orçamento de queries por endpoint
 from app.dependencies import get_current_user # <--- ADICIONE ESTA LINHA!
 
 router = APIRouter(
@@ -16,7 +18,7 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-@router.post("/token", response_model=Token)
+@router.post("/token", response_model=Token, dependencies=[Depends(query_budget.limit(2))])
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(), # Pega username (email) e password do formulário
     db: AsyncSession = Depends(get_db)
@@ -31,16 +33,21 @@ async def login_for_access_token(
             detail="Credenciais incorretas."
         )
     
-    # Verifica a senha hasheada
-    if not auth_service.verify_password(form_data.password, user.hashed_password):
+    # Verifica a senha hasheada (fora do event loop)
+    valid, new_hash = await auth_service.verify_and_update_password(form_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Credenciais incorretas."
         )
+
+    # O custo do bcrypt mudou desde que a senha foi salva: regrava com o custo atual
+    if new_hash:
+        await crud_user.update_password_hash(db, user.id, new_hash)
     
     # Se a senha estiver correta, cria o token
     access_token = auth_service.create_access_token(
-        data={"sub": user.email} # O "sub" (subject) do token será o email do usuário
+        data=auth_service.user_token_claims(user) # "sub" (email), id, flags e versão do token
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -51,4 +58,18 @@ async def read_users_me(current_user: crud_user.User = Depends(get_current_user)
     Retorna os dados do usuário logado. Requer autenticação.
     """
     # UserResponse é o schema seguro para retornar informações do usuário
-    return current_user
\ No newline at end of file
+    return current_user
+
+@router.get("/users/me/summary", response_model=UserOrderSummaryResponse, dependencies=[Depends(query_budget.limit(2))])
+async def read_users_me_summary(
+    db: AsyncSession = Depends(get_read_db),
+    current_user: crud_user.User = Depends(get_current_user)
+):
+    """
+    Retorna o resumo de pedidos do usuário logado (quantidade, total gasto e data do
+    último pedido, sem contar cancelados). Requer autenticação.
+    """
+    summary = await crud_order_summary.get_summary(db, current_user.id)
+    if summary is None:
+        return UserOrderSummaryResponse() # Usuário ainda sem pedidos
+    return summary
@@ -0,0 +1,23 @@
+# app/routers/metrics.py
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.database import get_pool_stats
+from app.services import metrics
+
+router = APIRouter(
+    tags=["Monitoring"],
+)
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def read_metrics():
+    """
+    Exporta as métricas deste worker no formato de texto do Prometheus: latência, status
+    e uso de banco por rota, requisições em andamento, bcrypt e pool de conexões.
+    Sem autenticação, para o scraper; restrinja o acesso na rede/proxy.
+    """
+    return PlainTextResponse(
+        metrics.render(get_pool_stats()),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
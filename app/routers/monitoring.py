@@ -0,0 +1,49 @@
+# app/routers/monitoring.py
+
+from fastapi import APIRouter, Depends
+
+from app.database import get_pool_stats, replica_engine
+from app.dependencies import get_current_admin_user
+from app.services import query_monitor
+from app.services import replica_routing
+from app.models.user import User # Para tipagem do current_user
+
+router = APIRouter(
+    prefix="/monitoring",
+    tags=["Monitoring"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.get("/db-pool")
+async def read_db_pool_stats(
+    current_user: User = Depends(get_current_admin_user) # Somente admin pode ver a telemetria
+):
+    """
+    Retorna as estatísticas do pool de conexões deste worker:
+    conexões em uso, overflow e histograma de espera por conexão.
+    Requer privilégios de administrador.
+    """
+    return get_pool_stats()
+
+@router.get("/queries")
+async def read_query_stats(
+    limit: int | None = None,
+    current_user: User = Depends(get_current_admin_user) # Somente admin pode ver a telemetria
+):
+    """
+    Retorna os statements SQL normalizados com maior tempo total acumulado neste worker
+    (chamadas, tempo total, tempo máximo e quantas foram lentas).
+    Requer privilégios de administrador.
+    """
+    return query_monitor.top_statements(limit)
+
+@router.get("/replica")
+async def read_replica_stats(
+    current_user: User = Depends(get_current_admin_user) # Somente admin pode ver a telemetria
+):
+    """
+    Retorna o estado da réplica de leitura neste worker: se está configurada e disponível,
+    o último atraso medido e o atraso máximo tolerado.
+    Requer privilégios de administrador.
+    """
+    return {"configured": replica_engine is not None, **replica_routing.stats()}
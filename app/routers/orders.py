@@ -1,12 +1,23 @@
 # app/routers/orders.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import hashlib
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Literal
+from datetime import datetime
 
-from app.database import get_db
-from app.schemas.order import OrderCreate, OrderUpdate, OrderResponse
+from app.config import settings
+from app.database import get_db, get_read_db
+from app.serialization import fast_json_response, order_rows
+from app.pagination import decode_cursor, set_next_cursor
+from app.schemas.order import OrderCreate, OrderUpdate, OrderResponse, OrderBulkStatusUpdate, OrderBulkStatusResult
 from app.crud import order as crud_order # Importa as funções CRUD de pedido
+from app.crud import idempotency as crud_idempotency
+from app.services import product_cache # O pedido altera o estoque dos produtos em cache
+from app.services import order_export
+from app.services import query_budget # Orçamento de queries por endpoint
 from app.dependencies import get_current_active_user, get_current_admin_user
 from app.models.user import User # Para tipagem do current_user
 
@@ -16,37 +27,88 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+def _order_cursor_key(order):
+    """Chave de paginação dos pedidos: (order_date, id)."""
+    return (order.order_date, order.id)
+
+# Orçamentos de queries contam a autenticação (até 1 query, na falta de cache da versão do token)
+@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(query_budget.limit(9))])
 async def create_new_order(
     order: OrderCreate,
+    idempotency_key: str | None = Header(None, min_length=1, max_length=255),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user) # Qualquer usuário ativo pode criar um pedido
 ):
     """
     Cria um novo pedido para o usuário logado.
     Requer autenticação de um usuário ativo.
+    Com o cabeçalho Idempotency-Key, repetições da mesma requisição (ex: retry após timeout)
+    devolvem o pedido já criado, sem criar outro nem mexer no estoque; reusar a chave
+    com outro corpo responde 422.
     """
-    db_order = await crud_order.create_order(db=db, user_id=current_user.id, order_data=order)
+    if idempotency_key is not None:
+        request_hash = hashlib.sha256(order.model_dump_json().encode()).hexdigest()
+        stored_response = await crud_idempotency.claim_key(db, current_user.id, idempotency_key, request_hash)
+        if stored_response is not None:
+            return Response(
+                content=stored_response,
+                media_type="application/json",
+                status_code=status.HTTP_201_CREATED,
+                headers={"Idempotent-Replayed": "true"},
+            )
+
+    db_order = await crud_order.create_order(
+        db=db, user_id=current_user.id, order_data=order, idempotency_key=idempotency_key
+    )
+    # Só as entradas dos produtos comprados; as listagens aceitam o estoque defasado até o TTL
+    product_cache.discard({item.product_id for item in db_order.items})
     return db_order
 
-@router.get("/me/", response_model=List[OrderResponse])
+@router.get("/me/", response_model=List[OrderResponse], dependencies=[Depends(query_budget.limit(3))])
 async def read_my_orders(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user) # Requer autenticação de um usuário ativo
 ):
     """
     Lista todos os pedidos do usuário logado.
     Requer autenticação de um usuário ativo.
+    Se a página vier cheia, o cabeçalho X-Next-Cursor traz o cursor da próxima página.
     """
-    orders = await crud_order.get_user_orders(db, user_id=current_user.id, skip=skip, limit=limit)
+    after = decode_cursor(cursor, datetime, int) if cursor else None
+    orders = await crud_order.get_user_orders(db, user_id=current_user.id, skip=skip, limit=limit, after=after)
+    set_next_cursor(response, orders, limit, key=_order_cursor_key)
+    if settings.FAST_JSON_RESPONSES:
+        return fast_json_response(order_rows(orders), response)
     return orders
 
-@router.get("/{order_id}", response_model=OrderResponse)
+@router.get("/export")
+async def export_orders(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    status: str | None = None,
+    current_user: User = Depends(get_current_admin_user) # Somente admin pode exportar pedidos
+):
+    """
+    Exporta todos os pedidos com seus itens em NDJSON ou CSV, em streaming.
+    Filtros opcionais: intervalo de datas [date_from, date_to) e status.
+    Requer privilégios de administrador.
+    """
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        order_export.export_orders(format, date_from=date_from, date_to=date_to, status=status),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="orders.{format}"'},
+    )
+
+@router.get("/{order_id}", response_model=OrderResponse, dependencies=[Depends(query_budget.limit(3))])
 async def read_single_order(
     order_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user) # Requer autenticação de um usuário ativo
 ):
     """
@@ -67,21 +129,42 @@ async def read_single_order(
         )
     return order
 
-@router.get("/", response_model=List[OrderResponse])
+@router.get("/", response_model=List[OrderResponse], dependencies=[Depends(query_budget.limit(3))])
 async def read_all_orders(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_admin_user) # Somente admin pode ver todos os pedidos
 ):
     """
     Lista todos os pedidos no sistema (apenas para administradores).
     Requer privilégios de administrador.
+    Se a página vier cheia, o cabeçalho X-Next-Cursor traz o cursor da próxima página.
     """
-    orders = await crud_order.get_all_orders(db, skip=skip, limit=limit)
+    after = decode_cursor(cursor, datetime, int) if cursor else None
+    orders = await crud_order.get_all_orders(db, skip=skip, limit=limit, after=after)
+    set_next_cursor(response, orders, limit, key=_order_cursor_key)
+    if settings.FAST_JSON_RESPONSES:
+        return fast_json_response(order_rows(orders), response)
     return orders
 
-@router.put("/{order_id}/status", response_model=OrderResponse)
+@router.post("/bulk-status", response_model=OrderBulkStatusResult, dependencies=[Depends(query_budget.limit(8))])
+async def bulk_update_order_status(
+    bulk_update: OrderBulkStatusUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user) # Somente admin pode atualizar o status dos pedidos
+):
+    """
+    Muda o status de vários pedidos de uma vez, escolhidos por IDs e/ou filtro.
+    Pedidos cujo status atual não permite a transição são ignorados; a resposta
+    traz apenas os IDs que mudaram. Requer privilégios de administrador.
+    """
+    updated_ids = await crud_order.bulk_update_order_status(db, bulk_update)
+    return {"updated_ids": updated_ids}
+
+@router.put("/{order_id}/status", response_model=OrderResponse, dependencies=[Depends(query_budget.limit(7))])
 async def update_order_status(
     order_id: int,
     order_update: OrderUpdate,
@@ -89,7 +172,8 @@ async def update_order_status(
     current_user: User = Depends(get_current_admin_user) # Somente admin pode atualizar o status do pedido
 ):
     """
-    Atualiza o status de um pedido. Requer privilégios de administrador.
+    Atualiza o status de um pedido. Só aceita as transições permitidas (as mesmas da
+    mudança em lote); as demais respondem 409. Requer privilégios de administrador.
     """
     updated_order = await crud_order.update_order_status(db, order_id, order_update)
     if not updated_order:
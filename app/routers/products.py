@@ -1,12 +1,20 @@
 # app/routers/products.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Literal
 
-from app.database import get_db
-from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse
+from app.config import settings
+from app.database import get_db, get_read_db
+from app.serialization import fast_json_response, product_rows
+from app.pagination import decode_cursor, set_next_cursor
+from app.schemas.product import ProductCreate, ProductFilters, ProductUpdate, ProductResponse
 from app.crud import product as crud_product # Importa as funções CRUD de produto
+from app.services import product_cache # Cache de leitura do catálogo
+from app.services import product_import # Importação em massa do catálogo
+from app.services import product_autocomplete # Índice de prefixos para o autocomplete
+from app.services import query_budget # Orçamento de queries por endpoint
+from app.services import replica_routing # Janela de read-your-writes do cliente
 from app.dependencies import get_current_active_user, get_current_admin_user
 from app.models.user import User # Para tipagem do current_user
 
@@ -16,6 +24,9 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+# Tipo do valor da coluna de ordenação guardado no cursor da listagem
+CURSOR_VALUE_TYPES = {"id": int, "price": float, "name": str}
+
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 async def create_new_product(
     product: ProductCreate,
@@ -31,31 +42,125 @@ async def create_new_product(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Produto com este nome já existe."
         )
-    return await crud_product.create_product(db=db, product=product)
+    db_product = await crud_product.create_product(db=db, product=product)
+    product_cache.invalidate(db_product.id)
+    product_autocomplete.upsert(db_product.id, db_product.name, db_product.is_active)
+    return db_product
+
+@router.post("/import")
+async def import_products(
+    request: Request,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user) # Somente admin pode importar produtos
+):
+    """
+    Importa um catálogo enviado no corpo da requisição, em NDJSON (um produto por linha)
+    ou CSV com cabeçalho. Produtos com nome já existente são atualizados.
+    O arquivo é lido em streaming e gravado em lotes; a resposta traz o resumo por lote
+    (inseridos, atualizados e rejeitados). Requer privilégios de administrador.
+    """
+    try:
+        summary = await product_import.import_products(db, request.stream(), format)
+    finally:
+        # Lotes já gravados continuam valendo mesmo se a importação falhar no meio
+        product_cache.invalidate()
+        await product_autocomplete.reload()
+    return summary
 
-@router.get("/", response_model=List[ProductResponse])
+@router.get("/", response_model=List[ProductResponse], dependencies=[Depends(query_budget.limit(1))])
 async def read_products(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db)
+    cursor: str | None = None,
+    filters: ProductFilters = Depends(),
+    db: AsyncSession = Depends(get_read_db)
     # Produtos podem ser listados por qualquer um (não requer autenticação)
 ):
     """
-    Lista todos os produtos com paginação.
+    Lista os produtos com paginação, com filtros opcionais (active_only, in_stock,
+    min_price, max_price) e ordenação por id, price ou name (order=asc|desc).
+    Se a página vier cheia, o cabeçalho X-Next-Cursor traz o cursor da próxima página.
+    """
+    # O cursor guarda a ordenação com que foi gerado, além da chave (valor, id) do último item
+    ordering = f"{filters.sort}:{filters.order}"
+    after = None
+    if cursor:
+        cursor_ordering, *after = decode_cursor(cursor, str, CURSOR_VALUE_TYPES[filters.sort], int)
+        if cursor_ordering != ordering:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor de paginação gerado com outra ordenação."
+            )
+        after = tuple(after)
+    products = await product_cache.get_products(
+        db, skip=skip, limit=limit, filters=filters, after=after,
+        fresh=replica_routing.in_read_your_writes_window(request),
+    )
+    set_next_cursor(
+        response, products, limit,
+        key=lambda product: (ordering, getattr(product, filters.sort), product.id),
+    )
+    if settings.FAST_JSON_RESPONSES:
+        return fast_json_response(product_rows(products), response)
+    return products
+
+@router.get("/search", response_model=List[ProductResponse])
+async def search_products(
+    response: Response,
+    q: str = Query(min_length=2, max_length=200, description="Termos de busca."),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_read_db)
+    # A busca é pública, como a listagem de produtos
+):
+    """
+    Busca produtos ativos por nome e descrição, ordenados por relevância.
+    Se a página vier cheia, o cabeçalho X-Next-Cursor traz o cursor da próxima página.
     """
-    products = await crud_product.get_products(db, skip=skip, limit=limit)
+    after = decode_cursor(cursor, float, int) if cursor else None
+    rows = await crud_product.search_products(db, q=q, limit=limit, after=after)
+    set_next_cursor(response, rows, limit, key=lambda row: (row.rank, row.Product.id))
+    products = [row.Product for row in rows]
+    if settings.FAST_JSON_RESPONSES:
+        return fast_json_response(product_rows(products), response)
     return products
 
-@router.get("/{product_id}", response_model=ProductResponse)
+@router.get("/autocomplete")
+async def autocomplete_products(
+    q: str = Query(min_length=1, max_length=100, description="Início do nome do produto."),
+    limit: int = Query(10, ge=1, le=50),
+    # Servido do índice em memória: não usa o banco
+):
+    """
+    Sugere produtos ativos cujo nome começa com q (sem diferenciar acentos e maiúsculas).
+    """
+    return product_autocomplete.suggest(q, limit)
+
+@router.get("/cache/stats")
+async def read_product_cache_stats(
+    current_user: User = Depends(get_current_admin_user) # Somente admin pode ver as estatísticas
+):
+    """
+    Retorna os contadores do cache de produtos (hits, misses, etc.). Requer privilégios de administrador.
+    """
+    return product_cache.stats()
+
+@router.get("/{product_id}", response_model=ProductResponse, dependencies=[Depends(query_budget.limit(1))])
 async def read_product(
     product_id: int,
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_read_db)
     # Produtos podem ser vistos por qualquer um (não requer autenticação)
 ):
     """
     Retorna um produto específico pelo ID.
     """
-    db_product = await crud_product.get_product(db, product_id=product_id)
+    db_product = await product_cache.get_product(
+        db, product_id=product_id, fresh=replica_routing.in_read_your_writes_window(request)
+    )
     if db_product is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -76,6 +181,8 @@ async def update_existing_product(
     updated_product = await crud_product.update_product(db, product_id, product)
     if not updated_product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Produto não encontrado.")
+    product_cache.invalidate(product_id)
+    product_autocomplete.upsert(updated_product.id, updated_product.name, updated_product.is_active)
     return updated_product
 
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -90,4 +197,6 @@ async def delete_existing_product(
     deleted = await crud_product.delete_product(db, product_id)
     if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Produto não encontrado.")
+    product_cache.invalidate(product_id)
+    product_autocomplete.remove(product_id)
     return
\ No newline at end of file
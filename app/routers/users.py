@@ -1,10 +1,13 @@
 # app/routers/users.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.database import get_db
+from app.config import settings
+from app.database import get_db, get_read_db
+from app.serialization import fast_json_response, user_rows
+from app.pagination import decode_cursor, set_next_cursor
 from app.schemas.user import UserCreate, UserResponse
 from app.crud import user as crud_user
 from app.models.user import User # Importe o modelo User para tipagem na dependência
@@ -33,21 +36,28 @@ async def create_new_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
 
 @router.get("/", response_model=List[UserResponse])
 async def read_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user) # Requer usuário autenticado e ativo
 ):
     """
     Lista todos os usuários com paginação. Requer autenticação de um usuário ativo.
+    Se a página vier cheia, o cabeçalho X-Next-Cursor traz o cursor da próxima página.
     """
-    users = await crud_user.get_users(db, skip=skip, limit=limit)
+    after_id = decode_cursor(cursor, int)[0] if cursor else None
+    users = await crud_user.get_users(db, skip=skip, limit=limit, after_id=after_id)
+    set_next_cursor(response, users, limit, key=lambda user: (user.id,))
+    if settings.FAST_JSON_RESPONSES:
+        return fast_json_response(user_rows(users), response)
     return users
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def read_user(
     user_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user) # Requer usuário autenticado e ativo
 ):
     """
@@ -0,0 +1,24 @@
+# app/schemas/analytics.py
+
+from pydantic import BaseModel
+from datetime import date
+
+# Schema para a API retornar o consolidado de vendas de um dia
+class DailySalesResponse(BaseModel):
+    day: date
+    order_count: int
+    units: int
+    revenue: float
+
+    class Config:
+        from_attributes = True
+
+# Schema para a API retornar o total de vendas de um produto no período
+class ProductSalesResponse(BaseModel):
+    product_id: int
+    order_count: int
+    units: int
+    revenue: float
+
+    class Config:
+        from_attributes = True
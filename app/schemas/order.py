@@ -1,8 +1,18 @@
 # app/schemas/order.py
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
+
+# Status possíveis de um pedido e as transições permitidas a partir de cada um
+OrderStatus = Literal["pending", "processing", "shipped", "delivered", "cancelled"]
+ORDER_STATUS_TRANSITIONS = {
+    "pending": {"processing", "cancelled"},
+    "processing": {"shipped", "cancelled"},
+    "shipped": {"delivered"},
+    "delivered": set(),
+    "cancelled": set(),
+}
 
 # --- Schemas para OrderItem (Item do Pedido) ---
 
@@ -29,10 +39,29 @@ class OrderCreate(BaseModel):
 
 # Schema para atualização de Pedido (principalmente para admin mudar o status)
 class OrderUpdate(BaseModel):
-    status: Optional[str] = Field(None, description="Novo status do pedido.")
+    status: Optional[OrderStatus] = Field(None, description="Novo status do pedido.")
     # Total amount e order_date não são geralmente atualizáveis via API por cliente/admin
     # Mas você pode adicionar outros campos se necessário, como endereço de entrega.
 
+# Schema para mudar o status de vários pedidos de uma vez (ondas de expedição)
+# Os pedidos são escolhidos pelos IDs e/ou por filtro (status atual e intervalo de datas)
+class OrderBulkStatusUpdate(BaseModel):
+    status: OrderStatus = Field(description="Novo status dos pedidos.")
+    order_ids: Optional[List[int]] = Field(None, min_length=1, max_length=10000, description="IDs dos pedidos.")
+    current_status: Optional[OrderStatus] = Field(None, description="Filtro: status atual dos pedidos.")
+    date_from: Optional[datetime] = Field(None, description="Filtro: pedidos a partir desta data.")
+    date_to: Optional[datetime] = Field(None, description="Filtro: pedidos antes desta data.")
+
+    @model_validator(mode="after")
+    def check_selection(self):
+        if self.order_ids is None and self.current_status is None and self.date_from is None and self.date_to is None:
+            raise ValueError("Informe order_ids ou ao menos um filtro (current_status, date_from, date_to).")
+        return self
+
+# Resposta da mudança de status em lote: só os pedidos que realmente mudaram
+class OrderBulkStatusResult(BaseModel):
+    updated_ids: List[int]
+
 # Schema para a API retornar um Pedido completo
 class OrderResponse(BaseModel):
     id: int
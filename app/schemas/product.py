@@ -1,6 +1,7 @@
 # app/schemas/product.py
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Literal
 
 # Schema para criação de produto (dados que o cliente envia ao criar)
 class ProductCreate(BaseModel):
@@ -18,6 +19,17 @@ class ProductUpdate(BaseModel):
     stock: int | None = Field(None, ge=0)
     is_active: bool | None = None
 
+# Filtros e ordenação da listagem de produtos (recebidos como query params)
+class ProductFilters(BaseModel):
+    model_config = ConfigDict(frozen=True) # Imutável e hashable: também serve de chave de cache
+
+    active_only: bool = False # Só produtos ativos
+    in_stock: bool = False # Só produtos com estoque
+    min_price: float | None = Field(None, ge=0)
+    max_price: float | None = Field(None, ge=0)
+    sort: Literal["id", "price", "name"] = "id"
+    order: Literal["asc", "desc"] = "asc"
+
 # Schema para visualização de produto (dados que a API retorna)
 class ProductResponse(BaseModel):
     id: int
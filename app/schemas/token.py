@@ -7,4 +7,8 @@ class Token(BaseModel):
 
 # Schema para os dados do token decodificado (payload)
 class TokenData(BaseModel):
-    email: str | None = None # O email do usuário dentro do token
\ No newline at end of file
+    email: str | None = None # O email do usuário dentro do token
+    user_id: int | None = None # Claim "uid"
+    is_active: bool | None = None # Claim "active"
+    is_admin: bool | None = None # Claim "admin"
+    token_version: int | None = None # Claim "ver", comparada com User.token_version
\ No newline at end of file
@@ -1,6 +1,7 @@
 # app/schemas/user.py
 
 from pydantic import BaseModel, EmailStr # EmailStr para validação de formato de email
+from datetime import datetime
 
 # Schema para criação de usuário (dados que o cliente envia ao criar)
 class UserCreate(BaseModel):
@@ -18,4 +19,13 @@ class UserResponse(BaseModel):
     class Config:
         # Isso permite que o Pydantic leia dados de um objeto ORM (como um objeto User do SQLAlchemy)
         # em vez de apenas de um dicionário. Essencial para mapear do DB para a resposta.
-        from_attributes = True # ou orm_mode = True em Pydantic < 2.0
\ No newline at end of file
+        from_attributes = True # ou orm_mode = True em Pydantic < 2.0
+
+# Schema para o resumo de pedidos do usuário (página da conta)
+class UserOrderSummaryResponse(BaseModel):
+    order_count: int = 0
+    lifetime_spend: float = 0.0
+    last_order_date: datetime | None = None
+
+    class Config:
+        from_attributes = True
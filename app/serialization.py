@@ -0,0 +1,86 @@
+# app/serialization.py
+
+import json
+from datetime import datetime
+
+from fastapi import Response
+
+try: # orjson é opcional: se estiver instalado, a codificação fica bem mais rápida
+    import orjson
+except ImportError: # pragma: no cover - depende do ambiente
+    orjson = None
+
+# Cabeçalhos do Response injetado no endpoint que não devem ser copiados para a resposta final
+_SKIP_HEADERS = {"content-length", "content-type"}
+
+class FastJSONResponse(Response):
+    """Resposta JSON cujo conteúdo já chega codificado em bytes."""
+    media_type = "application/json"
+
+def dumps(rows) -> bytes:
+    """Codifica listas/dicionários simples em JSON (bytes), com datas em ISO 8601."""
+    if orjson is not None:
+        return orjson.dumps(rows)
+    return json.dumps(rows, default=_json_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+def fast_json_response(rows, response: Response | None = None) -> FastJSONResponse:
+    """
+    Monta a resposta a partir de linhas já no formato do schema, sem a segunda validação
+    do response_model. Cabeçalhos definidos no Response injetado (ex: X-Next-Cursor) são mantidos.
+    """
+    headers = None
+    if response is not None:
+        headers = {key: value for key, value in response.headers.items() if key.lower() not in _SKIP_HEADERS}
+    return FastJSONResponse(content=dumps(rows), headers=headers)
+
+# --- Conversores para o formato dos schemas de resposta ---
+# Leem só os atributos que os schemas expõem, então servem tanto para objetos ORM
+# quanto para os ProductResponse guardados no cache.
+
+def product_rows(products) -> list[dict]:
+    """Linhas no formato de ProductResponse."""
+    return [
+        {
+            "id": product.id,
+            "name": product.name,
+            "description": product.description,
+            "price": product.price,
+            "stock": product.stock,
+            "is_active": product.is_active,
+        }
+        for product in products
+    ]
+
+def user_rows(users) -> list[dict]:
+    """Linhas no formato de UserResponse."""
+    return [
+        {"id": user.id, "email": user.email, "is_active": user.is_active, "is_admin": user.is_admin}
+        for user in users
+    ]
+
+def order_rows(orders) -> list[dict]:
+    """Linhas no formato de OrderResponse, com os itens aninhados."""
+    return [
+        {
+            "id": order.id,
+            "user_id": order.user_id,
+            "order_date": order.order_date,
+            "total_amount": order.total_amount,
+            "status": order.status,
+            "items": [
+                {
+                    "id": item.id,
+                    "product_id": item.product_id,
+                    "quantity": item.quantity,
+                    "price_at_purchase": item.price_at_purchase,
+                }
+                for item in order.items
+            ],
+        }
+        for order in orders
+    ]
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
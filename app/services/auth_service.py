@@ -1,31 +1,98 @@
 # app/services/auth_service.py
 
-from fastapi import HTTPException # Esta importação estava faltando no seu código anterior também!
+from fastapi import HTTPException, status # Esta importação estava faltando no seu código anterior também!
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Union, Any
+import asyncio
+import time
+import weakref
 from jose import JWTError, jwt
 from passlib.context import CryptContext # Para hash de senhas <--- NOVO
 
 from app.config import settings
 from app.schemas.token import TokenData
+from app.services import metrics
 
 # As credenciais e o algoritmo são carregados das configurações
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
-# Inicializa o contexto para hashing de senhas <--- NOVO
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Versão usada no cache para usuários removidos: nunca bate com a claim "ver" de um token
+REVOKED_TOKEN_VERSION = -1
+
+# Cache LRU em processo: user_id -> (token_version, momento em que foi carregada)
+_token_versions: "OrderedDict[int, tuple[int, float]]" = OrderedDict()
+
+# Contexto único para hashing de senhas, compartilhado por toda a aplicação.
+# min/max rounds iguais ao custo configurado fazem hashes com outro custo serem
+# marcados para atualização (rehash transparente no login).
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+)
+
+# O bcrypt libera o GIL, então um pool de threads dedicado basta para tirar o hash do event loop
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_MAX_WORKERS,
+    thread_name_prefix="password-hash",
+)
+# Vagas do pool por event loop: um Semaphore fica preso ao loop em que foi usado pela
+# primeira vez, e testes/scripts podem rodar vários loops (asyncio.run) no mesmo processo
+_password_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
 
 # --- Funções Auxiliares de Senha --- <--- NOVAS FUNÇÕES
 def get_password_hash(password: str) -> str:
-    """Hashea a senha fornecida."""
+    """Hashea a senha fornecida (síncrono; não chamar direto do event loop)."""
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verifica se a senha simples corresponde à senha hash."""
+    """Verifica se a senha simples corresponde à senha hash (síncrono; não chamar direto do event loop)."""
     return pwd_context.verify(plain_password, hashed_password)
 
+async def _run_password_task(func, *args):
+    """
+    Executa uma operação de bcrypt no pool dedicado, sem bloquear o event loop.
+    No máximo PASSWORD_HASH_MAX_WORKERS operações rodam ao mesmo tempo; se não houver
+    vaga em PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS, responde 503 em vez de acumular fila.
+    """
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    slots = _password_slots.get(loop)
+    if slots is None:
+        slots = _password_slots[loop] = asyncio.Semaphore(settings.PASSWORD_HASH_MAX_WORKERS)
+
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado. Tente novamente em instantes.",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        return await loop.run_in_executor(_password_executor, func, *args)
+    finally:
+        slots.release()
+        metrics.record_password_task(func.__name__, time.perf_counter() - start)
+
+async def hash_password(password: str) -> str:
+    """Hashea a senha fornecida no pool de hashing."""
+    return await _run_password_task(pwd_context.hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Verifica a senha no pool de hashing.
+    Retorna (válida, novo_hash); novo_hash vem preenchido quando o hash armazenado
+    usa um custo diferente do configurado e deve ser substituído.
+    """
+    return await _run_password_task(pwd_context.verify_and_update, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Union[timedelta, None] = None) -> str:
     """
     Cria um JSON Web Token (JWT) de acesso.
@@ -40,6 +107,19 @@ def create_access_token(data: dict, expires_delta: Union[timedelta, None] = None
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def user_token_claims(user) -> dict:
+    """
+    Monta as claims do token de um usuário. Com elas o token é suficiente para autorizar
+    as requisições, sem buscar o usuário no banco a cada chamada.
+    """
+    return {
+        "sub": user.email,
+        "uid": user.id,
+        "active": bool(user.is_active),
+        "admin": bool(user.is_admin),
+        "ver": user.token_version or 0,
+    }
+
 def verify_access_token(token: str, credentials_exception: HTTPException) -> TokenData:
     """
     Verifica a validade de um JWT e retorna seus dados.
@@ -49,7 +129,42 @@ def verify_access_token(token: str, credentials_exception: HTTPException) -> Tok
         email: str = payload.get("sub") # 'sub' é uma claim padrão para o "subject" (neste caso, o email)
         if email is None:
             raise credentials_exception # Token não tem o email esperado
-        token_data = TokenData(email=email)
+        token_data = TokenData(
+            email=email,
+            user_id=payload.get("uid"),
+            is_active=payload.get("active"),
+            is_admin=payload.get("admin"),
+            token_version=payload.get("ver"),
+        )
     except JWTError: # Se o token for inválido, expirado, etc.
         raise credentials_exception
-    return token_data
\ No newline at end of file
+    return token_data
+
+# --- Cache de versões de token ---
+
+def get_cached_token_version(user_id: int) -> int | None:
+    """
+    Retorna a versão de token do usuário guardada no cache, ou None se não estiver
+    em cache (ou se a entrada já expirou e precisa ser recarregada do banco).
+    """
+    entry = _token_versions.get(user_id)
+    if entry is None:
+        return None
+    version, loaded_at = entry
+    if time.monotonic() - loaded_at > settings.TOKEN_VERSION_CACHE_TTL_SECONDS:
+        # O TTL limita o tempo que outros workers levam para enxergar uma revogação
+        del _token_versions[user_id]
+        return None
+    _token_versions.move_to_end(user_id)
+    return version
+
+def cache_token_version(user_id: int, version: int) -> None:
+    """Guarda no cache a versão de token atual do usuário, respeitando o tamanho máximo."""
+    _token_versions[user_id] = (version, time.monotonic())
+    _token_versions.move_to_end(user_id)
+    while len(_token_versions) > settings.TOKEN_VERSION_CACHE_SIZE:
+        _token_versions.popitem(last=False)
+
+def revoke_user_tokens(user_id: int) -> None:
+    """Invalida, neste processo, todos os tokens de um usuário removido."""
+    cache_token_version(user_id, REVOKED_TOKEN_VERSION)
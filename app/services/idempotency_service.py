@@ -0,0 +1,27 @@
+# app/services/idempotency_service.py
+
+import asyncio
+import logging
+from datetime import timedelta
+
+from app.config import settings
+from app.crud import idempotency as crud_idempotency
+from app.database import async_session_maker
+
+logger = logging.getLogger(__name__)
+
+async def purge_expired_keys() -> int:
+    """Remove em lote as chaves de idempotência mais antigas que IDEMPOTENCY_KEY_TTL_HOURS."""
+    async with async_session_maker() as db:
+        return await crud_idempotency.delete_expired_keys(db, ttl=timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS))
+
+async def purge_periodically() -> None:
+    """Executa a limpeza das chaves expiradas a cada IDEMPOTENCY_PURGE_INTERVAL_SECONDS."""
+    while True:
+        await asyncio.sleep(settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS)
+        try:
+            removed = await purge_expired_keys()
+            if removed:
+                logger.info("%d chaves de idempotência expiradas removidas", removed)
+        except Exception: # Tenta de novo no próximo ciclo
+            logger.exception("Falha ao remover chaves de idempotência expiradas")
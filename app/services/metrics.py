@@ -0,0 +1,159 @@
+# app/services/metrics.py
+
+from bisect import bisect_left
+from contextvars import ContextVar, Token
+
+# Limites (em segundos) dos buckets dos histogramas de latência
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+# Rótulo das requisições que não casaram com nenhuma rota (evita uma série por caminho bruto)
+UNMATCHED_ROUTE = "<unmatched>"
+
+class Histogram:
+    """Histograma acumulado no formato do Prometheus (contagens por bucket, soma e total)."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class RequestStats:
+    """Queries feitas e tempo de banco acumulado pela requisição em andamento."""
+
+    __slots__ = ("db_queries", "db_seconds")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+
+# Contadores da requisição em andamento; os hooks do engine somam aqui
+_current_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+# Séries por (método, rota): histograma de latência e [queries, segundos de banco]
+_durations: dict[tuple[str, str], Histogram] = {}
+_db_usage: dict[tuple[str, str], list] = {}
+# Requisições por (método, rota, status) e em andamento por método
+_responses: dict[tuple[str, str, int], int] = {}
+_in_flight: dict[str, int] = {}
+# Duração das operações de bcrypt (incluindo a espera por vaga no pool de hashing)
+_password_durations: dict[str, Histogram] = {}
+
+def start_request(method: str) -> tuple[RequestStats, Token]:
+    """Marca o início de uma requisição e ativa seus contadores de banco."""
+    _in_flight[method] = _in_flight.get(method, 0) + 1
+    stats = RequestStats()
+    return stats, _current_stats.set(stats)
+
+def finish_request(method: str, route: str | None, status_code: int, seconds: float, stats: RequestStats, token: Token) -> None:
+    """Registra latência, status e uso de banco de uma requisição concluída."""
+    _current_stats.reset(token)
+    _in_flight[method] -= 1
+    key = (method, route or UNMATCHED_ROUTE)
+    histogram = _durations.get(key)
+    if histogram is None:
+        histogram = _durations[key] = Histogram()
+        _db_usage[key] = [0, 0.0]
+    histogram.observe(seconds)
+    usage = _db_usage[key]
+    usage[0] += stats.db_queries
+    usage[1] += stats.db_seconds
+    response_key = (*key, status_code)
+    _responses[response_key] = _responses.get(response_key, 0) + 1
+
+def record_db_query(seconds: float) -> None:
+    """Soma um statement à requisição em andamento (no-op fora de requisições)."""
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_seconds += seconds
+
+def record_password_task(operation: str, seconds: float) -> None:
+    """Registra a duração de uma operação de bcrypt (hash, verify_and_update)."""
+    histogram = _password_durations.get(operation)
+    if histogram is None:
+        histogram = _password_durations[operation] = Histogram()
+    histogram.observe(seconds)
+
+# --- Exposição em texto (formato do Prometheus) ---
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(**labels) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+def _format_bound(limit: float) -> str:
+    return "+Inf" if limit == float("inf") else repr(limit)
+
+def _histogram_lines(name: str, labels: str, histogram: Histogram) -> list[str]:
+    lines = []
+    cumulative = 0
+    separator = "," if labels else ""
+    for limit, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels}{separator}le="{_format_bound(limit)}"}} {cumulative}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+def _header(lines: list[str], name: str, kind: str, help_text: str) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+def render(pool_stats: dict | None = None) -> str:
+    """Gera todas as métricas deste worker no formato de texto do Prometheus."""
+    lines: list[str] = []
+
+    _header(lines, "http_requests_in_flight", "gauge", "Requisições em andamento.")
+    for method, count in sorted(_in_flight.items()):
+        lines.append(f"http_requests_in_flight{{{_labels(method=method)}}} {count}")
+
+    _header(lines, "http_requests_total", "counter", "Requisições concluídas por rota e status.")
+    for (method, route, status_code), count in sorted(_responses.items()):
+        lines.append(f"http_requests_total{{{_labels(method=method, route=route, status=status_code)}}} {count}")
+
+    _header(lines, "http_request_duration_seconds", "histogram", "Latência das requisições por rota.")
+    for (method, route), histogram in sorted(_durations.items()):
+        lines.extend(_histogram_lines("http_request_duration_seconds", _labels(method=method, route=route), histogram))
+
+    _header(lines, "http_request_db_queries_total", "counter", "Statements SQL executados pelas requisições de cada rota.")
+    for (method, route), (queries, _) in sorted(_db_usage.items()):
+        lines.append(f"http_request_db_queries_total{{{_labels(method=method, route=route)}}} {queries}")
+
+    _header(lines, "http_request_db_seconds_total", "counter", "Tempo gasto no banco pelas requisições de cada rota.")
+    for (method, route), (_, seconds) in sorted(_db_usage.items()):
+        lines.append(f"http_request_db_seconds_total{{{_labels(method=method, route=route)}}} {seconds}")
+
+    _header(lines, "password_hash_duration_seconds", "histogram", "Duração das operações de bcrypt, incluindo a fila.")
+    for operation, histogram in sorted(_password_durations.items()):
+        lines.extend(_histogram_lines("password_hash_duration_seconds", _labels(operation=operation), histogram))
+
+    if pool_stats is not None:
+        for name, key in (("db_pool_size", "size"), ("db_pool_checked_out", "checked_out"), ("db_pool_overflow", "overflow")):
+            _header(lines, name, "gauge", f"Pool de conexões: {key}.")
+            lines.append(f"{name} {pool_stats[key]}")
+        wait = pool_stats["wait_seconds"]
+        _header(lines, "db_pool_wait_seconds", "histogram", "Espera por uma conexão livre do pool.")
+        cumulative = 0
+        for bound, count in wait["buckets"].items():
+            cumulative += count
+            lines.append(f'db_pool_wait_seconds_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f"db_pool_wait_seconds_sum {wait['sum']}")
+        lines.append(f"db_pool_wait_seconds_count {wait['count']}")
+
+    return "\n".join(lines) + "\n"
+
+def reset() -> None:
+    """Zera as métricas acumuladas (as requisições em andamento continuam contadas)."""
+    _durations.clear()
+    _db_usage.clear()
+    _responses.clear()
+    _password_durations.clear()
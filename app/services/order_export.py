@@ -0,0 +1,71 @@
+# app/services/order_export.py
+
+import csv
+import io
+import json
+from datetime import datetime
+
+from app.config import settings
+from app.crud import order as crud_order
+from app.database import async_session_maker
+
+CSV_COLUMNS = [
+    "order_id", "user_id", "order_date", "total_amount", "status",
+    "item_id", "product_id", "quantity", "price_at_purchase",
+]
+
+async def export_orders(
+    file_format: str,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    status: str | None = None,
+):
+    """
+    Gera a exportação de pedidos em pedaços de texto, para uso em um StreamingResponse.
+    NDJSON: um pedido por linha, com a lista de itens.
+    CSV: uma linha por item (pedidos sem itens saem com as colunas de item vazias).
+
+    Abre a própria sessão, pois a sessão da dependência get_db é fechada antes
+    de o corpo de um StreamingResponse ser enviado.
+    """
+    async with async_session_maker() as db:
+        orders = crud_order.stream_orders_with_items(
+            db,
+            date_from=date_from,
+            date_to=date_to,
+            status=status,
+            yield_per=settings.ORDER_EXPORT_YIELD_PER,
+        )
+        if file_format == "csv":
+            async for chunk in _csv_chunks(orders):
+                yield chunk
+        else:
+            async for order in orders:
+                yield json.dumps(order, default=_json_default, separators=(",", ":")) + "\n"
+
+async def _csv_chunks(orders):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    # O cabeçalho sai já, mesmo que nenhum pedido case com os filtros
+    yield _drain(buffer)
+    async for order in orders:
+        base = [order["id"], order["user_id"], order["order_date"].isoformat(), order["total_amount"], order["status"]]
+        for item in order["items"] or [None]:
+            if item is None:
+                writer.writerow(base + ["", "", "", ""])
+            else:
+                writer.writerow(base + [item["id"], item["product_id"], item["quantity"], item["price_at_purchase"]])
+        yield _drain(buffer)
+
+def _drain(buffer: io.StringIO) -> str:
+    """Retorna o que já foi escrito no buffer e o esvazia para reaproveitá-lo."""
+    chunk = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return chunk
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
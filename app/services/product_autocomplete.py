@@ -0,0 +1,81 @@
+# app/services/product_autocomplete.py
+
+import asyncio
+import bisect
+import logging
+import unicodedata
+
+from sqlalchemy.future import select
+
+from app.config import settings
+from app.database import async_session_maker
+from app.models.product import Product
+
+logger = logging.getLogger(__name__)
+
+# Índice de prefixos em memória: lista ordenada de (nome normalizado, id, nome).
+# A busca por prefixo é uma busca binária + leitura sequencial, sem tocar o banco.
+_entries: list[tuple[str, int, str]] = []
+
+# product_id -> entrada atual, para remover/atualizar sem percorrer a lista
+_by_id: dict[int, tuple[str, int, str]] = {}
+
+def normalize(text: str) -> str:
+    """Normaliza para comparação: sem acentos e sem diferença de maiúsculas/minúsculas."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold().strip()
+
+def suggest(prefix: str, limit: int = 10) -> list[dict]:
+    """Retorna até limit produtos ativos cujo nome começa com prefix, em ordem alfabética."""
+    key = normalize(prefix)
+    if not key:
+        return []
+    suggestions = []
+    index = bisect.bisect_left(_entries, (key,))
+    while index < len(_entries) and len(suggestions) < limit:
+        normalized, product_id, name = _entries[index]
+        if not normalized.startswith(key):
+            break
+        suggestions.append({"id": product_id, "name": name})
+        index += 1
+    return suggestions
+
+def upsert(product_id: int, name: str, is_active: bool | None) -> None:
+    """Atualiza o índice após criar ou alterar um produto (inativos saem do índice)."""
+    remove(product_id)
+    if is_active is False:
+        return
+    entry = (normalize(name), product_id, name)
+    bisect.insort(_entries, entry)
+    _by_id[product_id] = entry
+
+def remove(product_id: int) -> None:
+    """Tira um produto do índice (ex: produto deletado)."""
+    entry = _by_id.pop(product_id, None)
+    if entry is None:
+        return
+    index = bisect.bisect_left(_entries, entry)
+    if index < len(_entries) and _entries[index] == entry:
+        del _entries[index]
+
+async def reload() -> None:
+    """Recarrega o índice inteiro a partir dos produtos ativos (na inicialização e após importações)."""
+    global _entries, _by_id
+    async with async_session_maker() as db:
+        result = await db.execute(select(Product.id, Product.name).where(Product.is_active.is_(True)))
+        entries = sorted((normalize(name), product_id, name) for product_id, name in result.all())
+    # Troca as estruturas de uma vez, para que as buscas nunca vejam um índice pela metade
+    _entries = entries
+    _by_id = {entry[1]: entry for entry in entries}
+
+async def refresh_periodically() -> None:
+    """
+    Recarrega o índice a cada PRODUCT_AUTOCOMPLETE_REFRESH_SECONDS, para que alterações
+    feitas por outros workers também apareçam aqui.
+    """
+    while True:
+        await asyncio.sleep(settings.PRODUCT_AUTOCOMPLETE_REFRESH_SECONDS)
+        try:
+            await reload()
+        except Exception: # Mantém o índice atual e tenta de novo no próximo ciclo
+            logger.exception("Falha ao recarregar o índice de autocomplete")
@@ -0,0 +1,174 @@
+# app/services/product_cache.py
+
+import asyncio
+import time
+from collections import OrderedDict
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.crud import product as crud_product
+from app.schemas.product import ProductFilters, ProductResponse
+from app.services import replica_routing
+
+# Cache LRU com TTL na frente de crud.product.get_product e get_products.
+# Guarda ProductResponse (e não objetos ORM), que podem ser compartilhados entre requisições.
+# Chaves: ("product", product_id) ou ("list", skip, limit, filters, after)
+_entries: "OrderedDict[tuple, tuple[object, float]]" = OrderedDict()
+
+# Carregamentos em andamento: requisições concorrentes com a mesma chave esperam o mesmo resultado
+_inflight: dict[tuple, asyncio.Future] = {}
+
+# Incrementada a cada invalidação; resultados carregados antes dela não são gravados
+_generation = 0
+
+# Momento (time.monotonic) da última invalidação de cada produto, das listagens e do cache
+# inteiro. Até REPLICA_MAX_LAG_SECONDS depois dela a réplica ainda pode devolver o valor
+# anterior à escrita, então o que vier da réplica nesse intervalo não é gravado
+_invalidated_at: dict[int, float] = {}
+_lists_invalidated_at = float("-inf")
+_all_invalidated_at = float("-inf")
+
+_stats = {"hits": 0, "misses": 0, "coalesced": 0, "bypassed": 0, "evictions": 0, "invalidations": 0}
+
+async def get_product(db: AsyncSession, product_id: int, fresh: bool = False) -> ProductResponse | None:
+    """
+    Retorna um produto pelo ID, lendo do cache sempre que possível.
+    Com fresh=True (cliente na janela de read-your-writes) o cache não é consultado.
+    """
+    async def load():
+        product = await crud_product.get_product(db, product_id=product_id)
+        return ProductResponse.model_validate(product) if product else None
+
+    return await _get_or_load(("product", product_id), load, fresh, replica_routing.is_replica(db))
+
+async def get_products(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    filters: ProductFilters | None = None,
+    after: tuple | None = None,
+    fresh: bool = False,
+) -> list[ProductResponse]:
+    """Retorna uma página de produtos, lendo do cache sempre que possível (fresh como em get_product)."""
+    async def load():
+        products = await crud_product.get_products(db, skip=skip, limit=limit, filters=filters, after=after)
+        return tuple(ProductResponse.model_validate(product) for product in products)
+
+    key = ("list", skip, limit, filters, after)
+    return list(await _get_or_load(key, load, fresh, replica_routing.is_replica(db)))
+
+def invalidate(product_id: int | None = None) -> None:
+    """
+    Remove um produto do cache, junto com todas as páginas de listagem (que podem contê-lo).
+    Sem product_id, limpa o cache inteiro.
+    """
+    global _generation, _lists_invalidated_at, _all_invalidated_at
+    _generation += 1
+    _stats["invalidations"] += 1
+    now = _lists_invalidated_at = time.monotonic()
+    if product_id is None:
+        _all_invalidated_at = now
+        _invalidated_at.clear()
+        _entries.clear()
+        return
+    for stale_id in [pid for pid, at in _invalidated_at.items() if now - at >= settings.REPLICA_MAX_LAG_SECONDS]:
+        del _invalidated_at[stale_id]
+    _invalidated_at[product_id] = now
+    _entries.pop(("product", product_id), None)
+    for key in [key for key in _entries if key[0] == "list"]:
+        del _entries[key]
+
+def discard(product_ids) -> None:
+    """
+    Tira do cache só as entradas dos produtos indicados (ex: estoque mudou num checkout).
+    Diferente de invalidate, mantém as páginas de listagem e não descarta os carregamentos
+    em andamento: nelas o estoque pode ficar desatualizado até o TTL.
+    """
+    for product_id in product_ids:
+        _entries.pop(("product", product_id), None)
+
+def stats() -> dict:
+    """
+    Retorna os contadores do cache (hits, misses, coalesced, bypassed, evictions,
+    invalidations) e o tamanho atual.
+    """
+    return {**_stats, "size": len(_entries)}
+
+def reset() -> None:
+    """Esvazia o cache e zera contadores e invalidações (carregamentos em andamento continuam)."""
+    global _lists_invalidated_at, _all_invalidated_at
+    _entries.clear()
+    _invalidated_at.clear()
+    _lists_invalidated_at = _all_invalidated_at = float("-inf")
+    for name in _stats:
+        _stats[name] = 0
+
+async def _get_or_load(key: tuple, load, fresh: bool = False, from_replica: bool = False):
+    if fresh:
+        # Nem o cache nem um carregamento em andamento (que pode vir da réplica) servem aqui;
+        # o valor lido agora ainda pode ser gravado para os próximos
+        _stats["bypassed"] += 1
+        generation = _generation
+        value = await load()
+        if generation == _generation and not (from_replica and _recently_invalidated(key)):
+            _store(key, value)
+        return value
+
+    entry = _entries.get(key)
+    if entry is not None:
+        value, expires_at = entry
+        if time.monotonic() < expires_at:
+            _entries.move_to_end(key)
+            _stats["hits"] += 1
+            return value
+        del _entries[key]
+
+    # Já existe uma query em andamento para esta chave: espera por ela em vez de repetir
+    inflight = _inflight.get(key)
+    if inflight is not None:
+        _stats["coalesced"] += 1
+        try:
+            return await asyncio.shield(inflight)
+        except asyncio.CancelledError:
+            if not inflight.cancelled():
+                raise
+            # Quem estava carregando foi cancelado (ex: cliente desconectou): carrega de novo
+            return await _get_or_load(key, load, fresh, from_replica)
+
+    _stats["misses"] += 1
+    generation = _generation
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        value = await load()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as exc:
+        future.set_exception(exc)
+        # Evita o aviso "exception was never retrieved" quando ninguém estava esperando
+        future.exception()
+        raise
+    else:
+        future.set_result(value)
+        if generation == _generation and not (from_replica and _recently_invalidated(key)):
+            _store(key, value)
+        return value
+    finally:
+        del _inflight[key]
+
+def _recently_invalidated(key: tuple) -> bool:
+    """Se algo que afeta a chave foi invalidado há menos de REPLICA_MAX_LAG_SECONDS."""
+    if key[0] == "list":
+        invalidated_at = _lists_invalidated_at
+    else:
+        invalidated_at = max(_all_invalidated_at, _invalidated_at.get(key[1], float("-inf")))
+    return time.monotonic() - invalidated_at < settings.REPLICA_MAX_LAG_SECONDS
+
+def _store(key: tuple, value) -> None:
+    _entries[key] = (value, time.monotonic() + settings.PRODUCT_CACHE_TTL_SECONDS)
+    _entries.move_to_end(key)
+    while len(_entries) > settings.PRODUCT_CACHE_SIZE:
+        _entries.popitem(last=False)
+        _stats["evictions"] += 1
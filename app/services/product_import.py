@@ -0,0 +1,173 @@
+# app/services/product_import.py
+
+import csv
+import json
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.crud import product as crud_product
+from app.schemas.product import ProductCreate
+
+# Quantos erros de validação são detalhados por lote (o total de rejeitadas é sempre contado)
+MAX_ERRORS_PER_BATCH = 20
+
+async def import_products(db: AsyncSession, chunks, file_format: str) -> dict:
+    """
+    Importa um catálogo em NDJSON ou CSV lido em streaming (chunks é um iterador
+    assíncrono de bytes, ex: request.stream()).
+    As linhas são validadas com ProductCreate e gravadas em lotes de
+    PRODUCT_IMPORT_BATCH_SIZE com upsert pelo nome; linhas e registros maiores que
+    PRODUCT_IMPORT_MAX_RECORD_BYTES são rejeitados. Assim a memória usada depende só
+    do tamanho do lote, não do arquivo.
+    Retorna o resumo por lote e os totais de inseridos, atualizados e rejeitados.
+    """
+    records = _iter_csv_records(chunks) if file_format == "csv" else _iter_ndjson_records(chunks)
+
+    batches = []
+    batch: list[ProductCreate] = []
+    errors: list[dict] = []
+    rejected = 0
+
+    async def flush():
+        nonlocal batch, errors, rejected
+        inserted, updated = await crud_product.upsert_products(db, batch)
+        batches.append({
+            "batch": len(batches) + 1,
+            "inserted": inserted,
+            "updated": updated,
+            "rejected": rejected,
+            "errors": errors,
+        })
+        batch, errors, rejected = [], [], 0
+
+    async for line_number, record in records:
+        try:
+            if isinstance(record, Exception):
+                raise record
+            batch.append(ProductCreate.model_validate(record))
+        except (ValidationError, ValueError) as exc:
+            rejected += 1
+            if len(errors) < MAX_ERRORS_PER_BATCH:
+                errors.append({"line": line_number, "error": str(exc)})
+
+        if len(batch) + rejected >= settings.PRODUCT_IMPORT_BATCH_SIZE:
+            await flush()
+
+    if batch or rejected:
+        await flush()
+
+    return {
+        "inserted": sum(item["inserted"] for item in batches),
+        "updated": sum(item["updated"] for item in batches),
+        "rejected": sum(item["rejected"] for item in batches),
+        "batches": batches,
+    }
+
+async def _iter_lines(chunks):
+    """
+    Converte um stream de bytes em linhas de texto, numeradas a partir de 1.
+    Linhas que não são UTF-8 válido vêm como ValueError, para serem rejeitadas.
+    Uma linha maior que PRODUCT_IMPORT_MAX_RECORD_BYTES também vem como ValueError,
+    assim que passa do limite; o resto dela é descartado sem ser guardado.
+    Cada chunk é percorrido uma vez só (o buffer não é redividido a cada chunk).
+    """
+    max_bytes = settings.PRODUCT_IMPORT_MAX_RECORD_BYTES
+    buffer = bytearray()
+    line_number = 0
+    skipping = False # Descartando o resto de uma linha grande demais
+    async for chunk in chunks:
+        start = 0
+        while True:
+            newline = chunk.find(b"\n", start)
+            end = len(chunk) if newline == -1 else newline
+            if not skipping:
+                buffer += chunk[start:end]
+                if len(buffer) > max_bytes:
+                    line_number += 1
+                    yield line_number, _line_too_long(max_bytes)
+                    buffer.clear()
+                    skipping = True
+            if newline == -1:
+                break
+            start = newline + 1
+            if skipping:
+                skipping = False # Fim da linha rejeitada
+                continue
+            line_number += 1
+            yield line_number, _decode_line(bytes(buffer), first=line_number == 1)
+            buffer.clear()
+    if buffer:
+        line_number += 1
+        yield line_number, _decode_line(bytes(buffer), first=line_number == 1)
+
+def _line_too_long(max_bytes: int) -> ValueError:
+    return ValueError(f"Registro maior que o limite de {max_bytes} bytes.")
+
+def _decode_line(line: bytes, first: bool):
+    try:
+        # utf-8-sig descarta o BOM que alguns editores colocam no início do arquivo
+        return line.decode("utf-8-sig" if first else "utf-8").rstrip("\r")
+    except UnicodeDecodeError as exc:
+        return ValueError(f"Linha com codificação inválida (esperado UTF-8): {exc}")
+
+async def _iter_ndjson_records(chunks):
+    """Um objeto JSON por linha; linhas em branco são ignoradas."""
+    async for line_number, line in _iter_lines(chunks):
+        if isinstance(line, Exception):
+            yield line_number, line
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("A linha não é um objeto JSON.")
+        except ValueError as exc:
+            record = ValueError(f"JSON inválido: {exc}")
+        yield line_number, record
+
+async def _iter_csv_records(chunks):
+    """
+    CSV com cabeçalho na primeira linha (name, description, price, stock, is_active).
+    Campos vazios são omitidos para que os valores padrão do schema sejam usados.
+    Campos entre aspas com quebras de linha são remontados antes do parse, até
+    PRODUCT_IMPORT_MAX_RECORD_BYTES: um registro maior (ex: aspas sem fechamento)
+    é rejeitado e a leitura recomeça na linha seguinte.
+    """
+    max_bytes = settings.PRODUCT_IMPORT_MAX_RECORD_BYTES
+    header = None
+    pending: list[str] = [] # Linhas do registro em montagem
+    pending_size = 0
+    pending_quotes = 0
+    start_line = 0
+    async for line_number, line in _iter_lines(chunks):
+        if isinstance(line, Exception):
+            yield line_number, line
+            continue
+        if not pending:
+            start_line = line_number
+        pending.append(line)
+        pending_size += len(line) + 1
+        pending_quotes += line.count('"')
+        if pending_quotes % 2: # Aspas abertas: o registro continua na próxima linha
+            if pending_size > max_bytes:
+                yield start_line, _line_too_long(max_bytes)
+                pending, pending_size, pending_quotes = [], 0, 0
+            continue
+        text = "\n".join(pending)
+        pending, pending_size, pending_quotes = [], 0, 0
+        if not text.strip():
+            continue
+
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield start_line, ValueError(f"Esperadas {len(header)} colunas, encontradas {len(values)}.")
+            continue
+        yield start_line, {key: value for key, value in zip(header, values) if value != ""}
+    if pending:
+        yield start_line, ValueError("Aspas sem fechamento até o fim do arquivo.")
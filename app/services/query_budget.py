@@ -0,0 +1,110 @@
+# app/services/query_budget.py
+#
+# Orçamento de queries por requisição (ou por bloco de código) e detecção de N+1.
+# O RequestContextMiddleware abre um rastreador por requisição; os hooks do engine
+# (query_monitor) contam cada statement nele. Um endpoint declara seu máximo com
+#
+#     @router.get("/me/", dependencies=[Depends(query_budget.limit(3))])
+#
+# e scripts/testes podem medir um trecho com `with query_budget.track("rótulo", 5): ...`.
+# QUERY_BUDGET_MODE="log" registra estouros e N+1 ao final; "raise" (testes) levanta
+# QueryBudgetExceeded no statement que estoura; "off" desliga a contagem.
+
+import logging
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+
+from fastapi import Request
+
+from app.config import settings
+
+logger = logging.getLogger("app.query_budget")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+class QueryBudgetExceeded(RuntimeError):
+    """Statement além do orçamento declarado ou repetido como N+1 (modo "raise")."""
+
+class QueryTracker:
+    """Statements executados por uma requisição ou bloco rastreado."""
+
+    __slots__ = ("label", "max_queries", "count", "statements")
+
+    def __init__(self, label: str | None = None, max_queries: int | None = None):
+        self.label = label
+        self.max_queries = max_queries
+        self.count = 0
+        self.statements: dict[str, int] = {} # SQL (com parâmetros vinculados) -> execuções
+
+    def repeated(self) -> list[tuple[str, int]]:
+        """Statements idênticos executados N_PLUS_ONE_THRESHOLD vezes ou mais."""
+        return [(sql, calls) for sql, calls in self.statements.items() if calls >= settings.N_PLUS_ONE_THRESHOLD]
+
+_current: ContextVar[QueryTracker | None] = ContextVar("query_tracker", default=None)
+
+def enabled() -> bool:
+    return settings.QUERY_BUDGET_MODE != "off"
+
+def start(label: str | None = None, max_queries: int | None = None) -> tuple[QueryTracker, Token]:
+    """Ativa um rastreador no contexto atual; encerre com finish()."""
+    tracker = QueryTracker(label, max_queries)
+    return tracker, _current.set(tracker)
+
+def finish(tracker: QueryTracker, token: Token, label: str | None = None) -> None:
+    """Desativa o rastreador e, no modo "log", registra estouro de orçamento e N+1."""
+    _current.reset(token)
+    if tracker.label is None:
+        tracker.label = label
+    if settings.QUERY_BUDGET_MODE != "log":
+        return
+    if tracker.max_queries is not None and tracker.count > tracker.max_queries:
+        logger.warning(
+            "Orçamento de queries estourado em %s: %d queries (máximo %d)",
+            tracker.label or "-", tracker.count, tracker.max_queries,
+        )
+    for sql, calls in tracker.repeated():
+        logger.warning("Possível N+1 em %s: statement repetido %d vezes: %s", tracker.label or "-", calls, _collapse(sql))
+
+@contextmanager
+def track(label: str, max_queries: int | None = None):
+    """Rastreia os statements de um bloco (ex: uma sessão num script ou teste)."""
+    tracker, token = start(label, max_queries)
+    try:
+        yield tracker
+    finally:
+        finish(tracker, token)
+
+def limit(max_queries: int):
+    """
+    Dependência de rota que declara o orçamento de queries do endpoint.
+    Conta a requisição inteira, inclusive as dependências (ex: autenticação).
+    """
+    async def _declare_budget(request: Request) -> None:
+        tracker = _current.get()
+        if tracker is not None:
+            tracker.max_queries = max_queries
+            tracker.label = f"{request.method} {request.scope['route'].path}"
+    return _declare_budget
+
+def record(statement: str) -> None:
+    """Conta um statement no rastreador ativo; chamado antes da execução (no-op fora dele)."""
+    tracker = _current.get()
+    if tracker is None:
+        return
+    tracker.count += 1
+    calls = tracker.statements.get(statement, 0) + 1
+    tracker.statements[statement] = calls
+
+    if settings.QUERY_BUDGET_MODE != "raise":
+        return
+    if tracker.max_queries is not None and tracker.count > tracker.max_queries:
+        raise QueryBudgetExceeded(
+            f"{tracker.label or '-'}: {tracker.count} queries, orçamento de {tracker.max_queries}. "
+            f"Statement: {_collapse(statement)}"
+        )
+    if calls == settings.N_PLUS_ONE_THRESHOLD:
+        raise QueryBudgetExceeded(f"{tracker.label or '-'}: possível N+1, statement repetido {calls} vezes: {_collapse(statement)}")
+
+def _collapse(statement: str) -> str:
+    return _WHITESPACE_RE.sub(" ", statement).strip()
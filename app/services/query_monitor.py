@@ -0,0 +1,114 @@
+# app/services/query_monitor.py
+
+import logging
+import re
+import time
+
+from sqlalchemy import event
+
+from app.config import settings
+from app.middleware import current_route
+from app.services import metrics
+from app.services import query_budget
+
+logger = logging.getLogger("app.slow_query")
+
+# Estatísticas agregadas por statement normalizado:
+# sql -> {"calls", "total_ms", "max_ms", "slow_calls"}
+_statements: dict[str, dict] = {}
+
+# Listas de placeholders (ex: IN ($1, $2, $3)) e literais numéricos viram um marcador só,
+# para que variações da mesma query caiam na mesma linha da tabela
+_PLACEHOLDER_LIST_RE = re.compile(r"(?:\$\d+|\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\$\d+|\?|%s|%\(\w+\)s|:\w+))*")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def normalize_statement(statement: str) -> str:
+    """Normaliza um SQL para agregação: espaços colapsados e parâmetros/literais trocados por '?'."""
+    statement = _WHITESPACE_RE.sub(" ", statement).strip()
+    statement = _PLACEHOLDER_LIST_RE.sub("?", statement)
+    return _NUMBER_RE.sub("?", statement)
+
+def install(engine) -> None:
+    """Registra os hooks de temporização de statements no engine (assíncrono ou síncrono)."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+def top_statements(limit: int | None = None) -> list[dict]:
+    """Retorna os statements normalizados com maior tempo total acumulado."""
+    limit = limit or settings.QUERY_STATS_TOP_N
+    ranked = sorted(_statements.items(), key=lambda item: item[1]["total_ms"], reverse=True)
+    return [{"statement": sql, **stats} for sql, stats in ranked[:limit]]
+
+def reset() -> None:
+    """Zera as estatísticas agregadas."""
+    _statements.clear()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    query_budget.record(statement) # Antes da execução: no modo "raise" o statement não chega ao banco
+    if context is not None:
+        context._query_monitor_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_query_monitor_start", None)
+    if start is None:
+        return
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    slow = elapsed_ms >= settings.SLOW_QUERY_THRESHOLD_MS
+
+    _record(statement, elapsed_ms, slow)
+    metrics.record_db_query(elapsed_ms / 1000) # Queries e tempo de banco da requisição em andamento
+
+    if slow:
+        plan = None
+        if settings.SLOW_QUERY_EXPLAIN and not executemany:
+            plan = _explain(conn, statement, parameters)
+        logger.warning(
+            "Query lenta (%.1f ms) na rota %s: %s%s",
+            elapsed_ms,
+            current_route() or "-",
+            _WHITESPACE_RE.sub(" ", statement).strip(),
+            f"\nPlano:\n{plan}" if plan else "",
+        )
+
+def _record(statement: str, elapsed_ms: float, slow: bool) -> None:
+    sql = normalize_statement(statement)
+    stats = _statements.get(sql)
+    if stats is None:
+        if len(_statements) >= settings.QUERY_STATS_MAX_STATEMENTS:
+            return # Tabela cheia: ignora statements novos em vez de crescer sem limite
+        stats = _statements[sql] = {"calls": 0, "total_ms": 0.0, "max_ms": 0.0, "slow_calls": 0}
+    stats["calls"] += 1
+    stats["total_ms"] += elapsed_ms
+    stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+    if slow:
+        stats["slow_calls"] += 1
+
+def _explain(conn, statement: str, parameters) -> str | None:
+    """
+    Roda EXPLAIN (sem ANALYZE, então nada é executado de novo) para o statement lento,
+    em um cursor separado da mesma conexão para não consumir o resultado original.
+    """
+    sqlite = conn.dialect.name == "sqlite"
+    explain_sql = f"EXPLAIN QUERY PLAN {statement}" if sqlite else f"EXPLAIN {statement}"
+    cursor = conn.connection.cursor()
+    try:
+        # No Postgres um erro abortaria a transação da requisição: isola o EXPLAIN num savepoint
+        if not sqlite:
+            cursor.execute("SAVEPOINT query_monitor_explain")
+        try:
+            cursor.execute(explain_sql, parameters)
+            plan = "\n".join(" ".join(str(value) for value in row) for row in cursor.fetchall())
+        except Exception:
+            if not sqlite:
+                cursor.execute("ROLLBACK TO SAVEPOINT query_monitor_explain")
+            raise
+        if not sqlite:
+            cursor.execute("RELEASE SAVEPOINT query_monitor_explain")
+        return plan
+    except Exception: # O EXPLAIN é só diagnóstico: nunca deve derrubar a query original
+        logger.debug("Falha ao capturar EXPLAIN", exc_info=True)
+        return None
+    finally:
+        cursor.close()
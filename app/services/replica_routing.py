@@ -0,0 +1,131 @@
+# app/services/replica_routing.py
+#
+# Decide se uma leitura pode ir para a réplica (DATABASE_REPLICA_URL) ou deve ficar no
+# primário. A réplica só é usada se estiver acessível e com atraso de replicação até
+# REPLICA_MAX_LAG_SECONDS. Depois de um commit no primário, o cliente recebe o cookie
+# READ_PRIMARY_COOKIE e suas leituras ficam no primário por READ_YOUR_WRITES_SECONDS,
+# em qualquer worker (ele sempre vê as próprias escritas).
+
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import text
+
+from app.config import settings
+
+logger = logging.getLogger("app.replica")
+
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+# Atraso medido na réplica (segundos; None se ela não está recebendo WAL) e até quando
+# ela fica fora depois de uma falha
+_state = {"lag_seconds": 0.0, "unavailable_until": 0.0}
+
+# Se a requisição em andamento fez commit no primário (lista mutável, compartilhada com os hooks)
+_request_wrote: ContextVar[list | None] = ContextVar("request_wrote", default=None)
+
+# Atraso da réplica no Postgres. NULL se o walreceiver não está em "streaming" (réplica
+# desconectada do primário: o atraso é desconhecido e só cresce); zero se ela já aplicou
+# tudo o que recebeu (senão um primário sem escritas pareceria atrasado); senão o tempo
+# desde a última transação aplicada. O usuário da réplica precisa do papel pg_monitor
+# (ou pg_read_all_stats) para ver o status em pg_stat_wal_receiver.
+_PG_LAG_QUERY = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN NULL"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())::float8"
+    " END"
+)
+
+def use_replica(request) -> bool:
+    """Se a leitura desta requisição pode ir para a réplica."""
+    lag = _state["lag_seconds"]
+    if time.time() < _state["unavailable_until"] or lag is None or lag > settings.REPLICA_MAX_LAG_SECONDS:
+        return False
+    return not in_read_your_writes_window(request)
+
+def in_read_your_writes_window(request) -> bool:
+    """
+    Se o cliente escreveu há menos de READ_YOUR_WRITES_SECONDS (cookie READ_PRIMARY_COOKIE).
+    O cookie vem do cliente: valores além da janela máxima são ignorados, para que ninguém
+    prenda suas leituras no primário (e fora do cache) indefinidamente.
+    """
+    read_primary_until = request.cookies.get(READ_PRIMARY_COOKIE)
+    if not read_primary_until:
+        return False
+    try:
+        until = float(read_primary_until)
+    except ValueError:
+        return False
+    now = time.time()
+    return now < until <= now + settings.READ_YOUR_WRITES_SECONDS
+
+def is_replica(session) -> bool:
+    """Se a sessão lê da réplica (marcada por get_read_db)."""
+    return session.info.get("replica", False)
+
+def mark_unavailable() -> None:
+    """Tira a réplica de uso por REPLICA_RETRY_SECONDS (ex: falha ao conectar)."""
+    _state["unavailable_until"] = time.time() + settings.REPLICA_RETRY_SECONDS
+    logger.warning("Réplica indisponível; leituras no primário por %.0fs", settings.REPLICA_RETRY_SECONDS)
+
+async def measure_lag(replica_engine) -> float | None:
+    """
+    Mede o atraso de replicação (segundos); None se a réplica não está recebendo WAL
+    do primário. Fora do Postgres só confere a conexão e retorna 0.
+    """
+    async with replica_engine.connect() as conn:
+        if conn.dialect.name != "postgresql":
+            await conn.execute(text("SELECT 1"))
+            return 0.0
+        lag = await conn.scalar(_PG_LAG_QUERY)
+        return None if lag is None else float(lag)
+
+async def monitor_periodically(replica_engine) -> None:
+    """Atualiza o atraso da réplica a cada REPLICA_LAG_CHECK_SECONDS."""
+    while True:
+        try:
+            _state["lag_seconds"] = lag = await measure_lag(replica_engine)
+            if lag is None:
+                logger.warning("Réplica fora de streaming com o primário; leituras no primário")
+        except Exception: # Réplica fora: leituras no primário até a próxima verificação
+            logger.exception("Falha ao medir o atraso da réplica")
+            mark_unavailable()
+        await asyncio.sleep(settings.REPLICA_LAG_CHECK_SECONDS)
+
+def stats() -> dict:
+    """Estado atual do roteamento (para a telemetria)."""
+    return {
+        "lag_seconds": _state["lag_seconds"],
+        "max_lag_seconds": settings.REPLICA_MAX_LAG_SECONDS,
+        "available": time.time() >= _state["unavailable_until"],
+    }
+
+def reset() -> None:
+    """Volta ao estado inicial: réplica disponível e sem atraso medido."""
+    _state.update(lag_seconds=0.0, unavailable_until=0.0)
+
+# --- Read-your-writes ---
+
+def start_request() -> tuple[list, object]:
+    """Começa a acompanhar se a requisição faz commit no primário."""
+    wrote = [False]
+    return wrote, _request_wrote.set(wrote)
+
+def finish_request(token) -> None:
+    _request_wrote.reset(token)
+
+def mark_write() -> None:
+    """Chamado após cada commit no primário (hook da sessão)."""
+    wrote = _request_wrote.get()
+    if wrote is not None:
+        wrote[0] = True
+
+def read_primary_cookie() -> bytes:
+    """Cabeçalho Set-Cookie que mantém as leituras do cliente no primário pela janela configurada."""
+    window = settings.READ_YOUR_WRITES_SECONDS
+    until = time.time() + window
+    return f"{READ_PRIMARY_COOKIE}={until:.3f}; Max-Age={int(window) + 1}; Path=/; HttpOnly; SameSite=Lax".encode()
@@ -0,0 +1,22 @@
+# app/services/sales_rollup.py
+#
+# Recalcula do zero os consolidados de vendas (sales_daily e product_sales_daily)
+# e os resumos de pedidos por usuário (user_order_summaries).
+# Uso: python -m app.services.sales_rollup
+
+import asyncio
+
+from app.crud import sales as crud_sales
+from app.crud import order_summary as crud_order_summary
+from app.database import async_session_maker
+from app.models import user, product, order, sales, order_summary # Registra todos os modelos no mapeamento
+
+async def rebuild_rollups() -> None:
+    """Recalcula os consolidados e os resumos por usuário a partir de orders e order_items."""
+    async with async_session_maker() as db:
+        await crud_sales.rebuild(db)
+        await crud_order_summary.rebuild(db)
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_rollups())
+    print("Consolidados de vendas e resumos de pedidos recalculados.")
@@ -0,0 +1,107 @@
+# app/services/stock_service.py
+
+from sqlalchemy import Integer, case, column, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from fastapi import HTTPException, status
+
+from app.models.product import Product
+
+async def reserve_stock(db: AsyncSession, quantities: dict[int, int]) -> dict[int, float]:
+    """
+    Reserva o estoque de vários produtos de uma vez, com um único UPDATE condicional:
+
+        UPDATE products SET stock = stock - q
+        WHERE id = ? AND is_active AND stock >= q
+        RETURNING id, price
+
+    A checagem e a baixa acontecem atomicamente no banco, então pedidos concorrentes
+    nunca perdem atualizações nem deixam o estoque negativo.
+    Retorna um dicionário {product_id: preço} com o preço usado na compra.
+    Se algum produto não puder ser reservado, desfaz a transação e levanta HTTPException.
+    """
+    product_ids = sorted(quantities)
+    if db.bind.dialect.name == "sqlite":
+        prices = await _reserve_stock_sqlite(db, quantities, product_ids)
+    else:
+        prices = await _reserve_stock_values(db, quantities, product_ids)
+
+    if len(prices) < len(product_ids):
+        await db.rollback()
+        await _raise_reservation_error(db, quantities, prices.keys())
+
+    return prices
+
+async def _reserve_stock_values(db: AsyncSession, quantities: dict[int, int], product_ids: list[int]) -> dict[int, float]:
+    """Postgres: UPDATE ... FROM (VALUES ...) com as linhas travadas em ordem de ID."""
+    requested = values(
+        column("id", Integer), column("quantity", Integer), name="requested"
+    ).data([(product_id, quantities[product_id]) for product_id in product_ids])
+
+    # Trava as linhas sempre na mesma ordem (por ID) para evitar deadlocks entre pedidos
+    locked_ids = (
+        select(Product.id)
+        .where(Product.id.in_(product_ids))
+        .order_by(Product.id)
+        .with_for_update()
+    )
+
+    result = await db.execute(
+        update(Product)
+        .where(
+            Product.id == requested.c.id,
+            Product.id.in_(locked_ids),
+            Product.is_active.is_(True),
+            Product.stock >= requested.c.quantity,
+        )
+        .values(stock=Product.stock - requested.c.quantity)
+        .returning(Product.id, Product.price)
+        .execution_options(synchronize_session=False)
+    )
+    return {row.id: row.price for row in result.all()}
+
+async def _reserve_stock_sqlite(db: AsyncSession, quantities: dict[int, int], product_ids: list[int]) -> dict[int, float]:
+    """
+    SQLite não aceita UPDATE ... FROM (VALUES ...) nem FOR UPDATE: a quantidade de cada
+    produto vem de um CASE, no mesmo UPDATE condicional único. O SQLite serializa as
+    escritas no banco inteiro, então não há ordem de travamento a respeitar.
+    """
+    requested = case(quantities, value=Product.id)
+    result = await db.execute(
+        update(Product)
+        .where(
+            Product.id.in_(product_ids),
+            Product.is_active.is_(True),
+            Product.stock >= requested,
+        )
+        .values(stock=Product.stock - requested)
+        .returning(Product.id, Product.price)
+        .execution_options(synchronize_session=False)
+    )
+    return {row.id: row.price for row in result.all()}
+
+async def _raise_reservation_error(db: AsyncSession, quantities: dict[int, int], reserved_ids) -> None:
+    """Descobre por que a reserva falhou e levanta a HTTPException correspondente."""
+    failed_ids = sorted(set(quantities) - set(reserved_ids))
+    result = await db.execute(select(Product).where(Product.id.in_(failed_ids)))
+    products = {product.id: product for product in result.scalars().all()}
+
+    for product_id in failed_ids:
+        product = products.get(product_id)
+
+        if not product:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Produto com ID {product_id} não encontrado."
+            )
+
+        if not product.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Produto '{product.name}' não está ativo para compra."
+            )
+
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Estoque insuficiente para o produto '{product.name}'. Disponível: {product.stock}, Solicitado: {quantities[product_id]}."
+        )
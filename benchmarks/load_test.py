@@ -0,0 +1,331 @@
+# benchmarks/load_test.py
+#
+# Teste de carga da API: sobe app.main:app em processo (httpx + ASGITransport, com o
+# evento de startup), popula o banco na escala pedida e dispara clientes assíncronos
+# concorrentes com misturas realistas de tráfego (navegação no catálogo, login,
+# checkout, listagens de admin). Reporta por endpoint p50/p95/p99, requisições por
+# segundo e queries por requisição, e falha se os resultados piorarem além da
+# tolerância em relação a um baseline salvo.
+#
+# Roda contra o banco de DATABASE_URL (ex: o Postgres do docker-compose); sem ela,
+# usa um SQLite temporário (requer aiosqlite). Requer httpx. O banco é recriado do zero.
+#
+# Uso: python -m benchmarks.load_test [--users 200] [--products 1000] [--orders 2000]
+#          [--clients 50] [--duration 30] [--baseline benchmarks/baselines/load_test.json]
+#          [--save-baseline] [--tolerance 0.2]
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/load_test.db"
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+import httpx
+from sqlalchemy import event, insert
+
+from app.crud import sales as crud_sales
+from app.crud import order_summary as crud_order_summary
+from app.database import Base, async_session_maker, engine
+from app import migrations
+from app.main import app
+from app.models.order import Order, OrderItem
+from app.models.product import Product
+from app.models.user import User
+from app.services import auth_service
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "load_test.json"
+PASSWORD = "benchmark-password"
+ADMIN_EMAIL = "admin@bench.example.com"
+SEARCH_TERMS = ["produto", "azul", "camiseta", "caneca", "livro"]
+STATUSES = ["pending", "processing", "shipped", "delivered", "cancelled"]
+
+# --- Dados ---
+
+async def seed(users: int, products: int, orders: int, items: int) -> None:
+    """Recria o schema e popula usuários, produtos e pedidos com itens em lote."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await migrations.migrate()
+
+    hashed_password = await auth_service.hash_password(PASSWORD) # Um hash só para todos
+    rng = random.Random(42)
+    async with async_session_maker() as db:
+        await db.execute(insert(User), [
+            {"email": ADMIN_EMAIL, "hashed_password": hashed_password, "is_admin": True},
+            *({"email": f"user{n}@bench.example.com", "hashed_password": hashed_password} for n in range(users)),
+        ])
+        await db.execute(insert(Product), [
+            {
+                "name": f"Produto {n} {rng.choice(SEARCH_TERMS)}",
+                "description": f"Descrição do produto {n} " + " ".join(rng.choices(SEARCH_TERMS, k=8)),
+                "price": round(rng.uniform(5, 500), 2),
+                "stock": 1_000_000, # O checkout não deve esgotar o estoque durante o teste
+            }
+            for n in range(products)
+        ])
+        order_ids = (await db.execute(
+            insert(Order).returning(Order.id),
+            [
+                {
+                    "user_id": rng.randint(2, users + 1),
+                    "total_amount": 0.0,
+                    "status": rng.choice(STATUSES),
+                }
+                for _ in range(orders)
+            ],
+        )).scalars().all()
+        await db.execute(insert(OrderItem), [
+            {"order_id": order_id, "product_id": product_id, "quantity": rng.randint(1, 3), "price_at_purchase": 10.0}
+            for order_id in order_ids
+            for product_id in rng.sample(range(1, products + 1), min(items, products))
+        ])
+        await db.commit()
+        # Consolidados e resumos coerentes com os pedidos semeados
+        await crud_sales.rebuild(db)
+        await crud_order_summary.rebuild(db)
+
+# --- Cenários ---
+# Cada passo é (rótulo do endpoint, método, caminho, kwargs do httpx). Os rótulos usam
+# o template da rota, para que /products/17 e /products/42 caiam na mesma linha.
+
+class VirtualClient:
+    """Um cliente simulado: uma conta, seu token e um gerador de números próprio."""
+
+    def __init__(self, http: httpx.AsyncClient, email: str, args, rng: random.Random):
+        self.http = http
+        self.email = email
+        self.args = args
+        self.rng = rng
+        self.headers: dict = {}
+
+    def product_id(self) -> int:
+        return self.rng.randint(1, self.args.products)
+
+    def login(self):
+        return [("POST /token", "POST", "/token", {"data": {"username": self.email, "password": PASSWORD}})]
+
+    def browse(self):
+        term = self.rng.choice(SEARCH_TERMS)
+        return [
+            ("GET /products/", "GET", "/products/", {"params": {"limit": 20}}),
+            ("GET /products/", "GET", "/products/", {"params": {"limit": 20, "sort": "price", "in_stock": True}}),
+            ("GET /products/search", "GET", "/products/search", {"params": {"q": term}}),
+            ("GET /products/autocomplete", "GET", "/products/autocomplete", {"params": {"q": term[:3]}}),
+            ("GET /products/{product_id}", "GET", f"/products/{self.product_id()}", {}),
+            ("GET /products/{product_id}", "GET", f"/products/{self.product_id()}", {}),
+        ]
+
+    def checkout(self):
+        items = [{"product_id": self.product_id(), "quantity": self.rng.randint(1, 3)} for _ in range(self.rng.randint(1, 4))]
+        return [
+            ("GET /users/me/", "GET", "/users/me/", {}),
+            ("POST /orders/", "POST", "/orders/", {"json": {"items": items}}),
+            ("GET /orders/me/", "GET", "/orders/me/", {"params": {"limit": 10}}),
+            ("GET /users/me/summary", "GET", "/users/me/summary", {}),
+        ]
+
+    def admin(self):
+        order_id = self.rng.randint(1, self.args.orders)
+        return [
+            ("GET /orders/", "GET", "/orders/", {"params": {"limit": 50}}),
+            ("GET /orders/{order_id}", "GET", f"/orders/{order_id}", {}),
+            ("GET /users/", "GET", "/users/", {"params": {"limit": 50}}),
+            ("GET /users/{user_id}", "GET", f"/users/{self.rng.randint(1, self.args.users)}", {}),
+            ("GET /analytics/sales/daily", "GET", "/analytics/sales/daily", {}),
+            ("GET /analytics/products/top", "GET", "/analytics/products/top", {}),
+            ("GET /products/cache/stats", "GET", "/products/cache/stats", {}),
+            ("GET /monitoring/db-pool", "GET", "/monitoring/db-pool", {}),
+        ]
+
+    async def request(self, label: str, method: str, path: str, kwargs: dict) -> tuple[float, int]:
+        start = time.perf_counter()
+        response = await self.http.request(method, path, headers=self.headers, **kwargs)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if label == "POST /token" and response.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return elapsed_ms, response.status_code
+
+# Peso de cada mistura de tráfego (a de admin só roda nos clientes operadores do painel)
+MIXES = {
+    "browse": 0.6,
+    "checkout": 0.25,
+    "login": 0.1,
+    "admin": 0.05,
+}
+
+# --- Medição ---
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Percentil pelo método nearest-rank sobre uma lista já ordenada."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+class StatementCounter:
+    """Conta os statements enviados ao banco enquanto está ativo."""
+
+    def __init__(self):
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+async def measure_queries(http: httpx.AsyncClient, args) -> dict[str, float]:
+    """
+    Passada sequencial (um cliente por vez) medindo queries por requisição de cada
+    endpoint. Sequencial porque, sob concorrência, não há como atribuir cada statement
+    à requisição que o gerou sem instrumentar a aplicação.
+    """
+    counts: dict[str, list[int]] = defaultdict(list)
+    rng = random.Random(7)
+    clients = [
+        VirtualClient(http, "user0@bench.example.com", args, rng),
+        VirtualClient(http, ADMIN_EMAIL, args, rng),
+    ]
+    for client, mixes in ((clients[0], ("login", "browse", "checkout")), (clients[1], ("login", "admin"))):
+        for _ in range(3):
+            for mix in mixes:
+                for step in getattr(client, mix)():
+                    with StatementCounter() as counter:
+                        await client.request(*step)
+                    counts[step[0]].append(counter.count)
+    return {label: sum(values) / len(values) for label, values in counts.items()}
+
+async def run_load(http: httpx.AsyncClient, args) -> tuple[dict[str, list[float]], dict[str, int], float]:
+    """Dispara os clientes concorrentes pelo tempo pedido; retorna latências, erros e duração real."""
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    deadline = time.perf_counter() + args.duration
+
+    async def client_loop(index: int):
+        rng = random.Random(index)
+        is_admin = index % 20 == 0 # 1 em cada 20 clientes é um operador do painel
+        email = ADMIN_EMAIL if is_admin else f"user{index % args.users}@bench.example.com"
+        client = VirtualClient(http, email, args, rng)
+        for step in client.login():
+            await client.request(*step) # Login inicial fora da medição
+        mixes = ["admin"] if is_admin else [mix for mix in MIXES if mix != "admin"]
+        weights = [MIXES[mix] for mix in mixes]
+        while time.perf_counter() < deadline:
+            mix = rng.choices(mixes, weights)[0]
+            for label, method, path, kwargs in getattr(client, mix)():
+                elapsed_ms, status_code = await client.request(label, method, path, kwargs)
+                latencies[label].append(elapsed_ms)
+                if status_code >= 400:
+                    errors[label] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop(index) for index in range(args.clients)))
+    return latencies, errors, time.perf_counter() - start
+
+def summarize(latencies, errors, elapsed: float, queries: dict[str, float]) -> dict[str, dict]:
+    results = {}
+    for label in sorted(latencies):
+        values = sorted(latencies[label])
+        results[label] = {
+            "requests": len(values),
+            "errors": errors.get(label, 0),
+            "rps": len(values) / elapsed,
+            "p50_ms": percentile(values, 0.50),
+            "p95_ms": percentile(values, 0.95),
+            "p99_ms": percentile(values, 0.99),
+            "queries_per_request": queries.get(label),
+        }
+    return results
+
+def print_report(results: dict[str, dict]) -> None:
+    print(f"{'endpoint':<32} {'reqs':>7} {'erros':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}")
+    for label, row in results.items():
+        queries = "-" if row["queries_per_request"] is None else f"{row['queries_per_request']:.1f}"
+        print(f"{label:<32} {row['requests']:>7} {row['errors']:>6} {row['rps']:>8.1f} "
+              f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {queries:>8}")
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], tolerance: float) -> list[str]:
+    """Lista as regressões em relação ao baseline (latência, vazão, queries e erros)."""
+    regressions = []
+    for label, base in baseline.items():
+        row = results.get(label)
+        if row is None:
+            regressions.append(f"{label}: endpoint não exercitado nesta execução")
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if row[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{label}: {key} {row[key]:.1f} > {base[key]:.1f} (+{tolerance:.0%})")
+        if row["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{label}: req/s {row['rps']:.1f} < {base['rps']:.1f} (-{tolerance:.0%})")
+        # Queries por requisição não dependem da máquina: qualquer aumento é regressão
+        if base.get("queries_per_request") is not None and (row["queries_per_request"] or 0) > base["queries_per_request"]:
+            regressions.append(f"{label}: queries por requisição {row['queries_per_request']:.1f} > {base['queries_per_request']:.1f}")
+        if row["errors"] > base.get("errors", 0):
+            regressions.append(f"{label}: {row['errors']} erros (baseline: {base.get('errors', 0)})")
+    return regressions
+
+async def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=3, help="itens por pedido semeado")
+    parser.add_argument("--clients", type=int, default=50, help="clientes concorrentes")
+    parser.add_argument("--duration", type=float, default=30.0, help="segundos de carga")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="grava os resultados como novo baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="piora relativa aceita em latência e vazão")
+    args = parser.parse_args()
+
+    print(f"Populando o banco: {args.users} usuários, {args.products} produtos, {args.orders} pedidos...")
+    await seed(args.users, args.products, args.orders, args.items)
+
+    await app.router.startup() # Mesmo startup do servidor (tabelas, índice do autocomplete, tarefas)
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test") as http:
+            queries = await measure_queries(http, args)
+            print(f"Carga: {args.clients} clientes por {args.duration:.0f}s...")
+            latencies, errors, elapsed = await run_load(http, args)
+    finally:
+        await app.router.shutdown() # Encerra as tarefas periódicas e fecha os pools
+
+    results = summarize(latencies, errors, elapsed, queries)
+    print_report(results)
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(results, indent=2, sort_keys=True))
+        print(f"Baseline gravado em {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"Sem baseline em {args.baseline}; rode com --save-baseline para criar um.")
+        return 0
+
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+    if regressions:
+        print("\nRegressões em relação ao baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("\nSem regressões em relação ao baseline.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,97 @@
+# benchmarks/order_reads.py
+#
+# Mede queries e alocações das listagens de pedidos: o carregamento antigo
+# (itens + produtos + usuário) contra o atual (só itens, só as colunas da resposta).
+# Roda contra o banco de DATABASE_URL; sem ela, usa um SQLite temporário (requer aiosqlite).
+#
+# Uso: python -m benchmarks.order_reads [--orders 100] [--items 5]
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db"
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+from sqlalchemy import event
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+
+from app.crud import order as crud_order
+from app.database import Base, async_session_maker, engine
+from app.models.order import Order, OrderItem
+from app.models.product import Product
+from app.models.user import User
+
+async def seed(orders: int, items: int) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_session_maker() as db:
+        user = User(email="bench@example.com", hashed_password="x")
+        products = [Product(name=f"Produto {n}", description="x" * 200, price=10.0, stock=1000) for n in range(items)]
+        db.add(user)
+        db.add_all(products)
+        await db.flush()
+        for _ in range(orders):
+            db.add(Order(
+                user_id=user.id,
+                total_amount=10.0 * items,
+                status="pending",
+                items=[OrderItem(product_id=p.id, quantity=1, price_at_purchase=10.0) for p in products],
+            ))
+        await db.commit()
+
+async def legacy_get_all_orders(db, limit: int):
+    # Carregamento usado antes: produtos e usuários que a resposta nunca devolve
+    result = await db.execute(
+        select(Order)
+        .limit(limit)
+        .options(
+            selectinload(Order.items).selectinload(OrderItem.product),
+            selectinload(Order.user),
+        )
+        .order_by(Order.order_date.desc())
+    )
+    return result.scalars().all()
+
+async def measure(label: str, load, limit: int) -> None:
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    try:
+        async with async_session_maker() as db:
+            tracemalloc.start()
+            start = time.perf_counter()
+            orders = await load(db, limit)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+    print(f"  {label:<10} {len(orders)} pedidos: {len(statements)} queries, "
+          f"pico de {peak / 1024:.0f} KiB alocados, {elapsed_ms:.1f} ms")
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=100)
+    parser.add_argument("--items", type=int, default=5)
+    args = parser.parse_args()
+
+    await seed(args.orders, args.items)
+    print(f"get_all_orders (limit={args.orders}, {args.items} itens por pedido)")
+    await measure("antigo", legacy_get_all_orders, args.orders)
+    await measure("atual", lambda db, limit: crud_order.get_all_orders(db, limit=limit), args.orders)
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+# benchmarks/serialization.py
+#
+# Compara o caminho padrão de serialização do FastAPI (validação pelo response_model
+# a partir dos atributos + dump + json) com o caminho rápido de app/serialization.py,
+# para uma página de pedidos com itens aninhados.
+#
+# Uso: python -m benchmarks.serialization [--orders 100] [--items 5] [--repeat 200]
+
+import argparse
+import json
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.schemas.order import OrderResponse
+from app.serialization import dumps, order_rows
+
+def build_orders(count: int, items_per_order: int) -> list:
+    """Cria objetos com os mesmos atributos dos modelos ORM de pedido."""
+    return [
+        SimpleNamespace(
+            id=order_id,
+            user_id=order_id % 97,
+            order_date=datetime(2024, 1, 1, 12, 0, order_id % 60),
+            total_amount=123.45,
+            status="pending",
+            items=[
+                SimpleNamespace(id=order_id * 100 + n, product_id=n + 1, quantity=2, price_at_purchase=9.99)
+                for n in range(items_per_order)
+            ],
+        )
+        for order_id in range(1, count + 1)
+    ]
+
+def default_path(adapter: TypeAdapter, orders: list) -> bytes:
+    # O que o FastAPI faz com response_model=List[OrderResponse]
+    validated = adapter.validate_python(orders, from_attributes=True)
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+def fast_path(orders: list) -> bytes:
+    return dumps(order_rows(orders))
+
+def timeit(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=100)
+    parser.add_argument("--items", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    orders = build_orders(args.orders, args.items)
+    adapter = TypeAdapter(List[OrderResponse])
+
+    # Os dois caminhos precisam produzir o mesmo JSON
+    assert json.loads(default_path(adapter, orders)) == json.loads(fast_path(orders))
+
+    default_ms = timeit(lambda: default_path(adapter, orders), args.repeat)
+    fast_ms = timeit(lambda: fast_path(orders), args.repeat)
+    print(f"{args.orders} pedidos x {args.items} itens, {args.repeat} repetições")
+    print(f"  response_model (validação + dump): {default_ms:8.3f} ms/resposta")
+    print(f"  caminho rápido:                    {fast_ms:8.3f} ms/resposta")
+    print(f"  ganho: {default_ms / fast_ms:.1f}x")
+
+if __name__ == "__main__":
+    main()
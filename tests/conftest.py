@@ -0,0 +1,78 @@
+# tests/conftest.py
+#
+# Os testes rodam contra bancos locais: DATABASE_URL (ex: o Postgres do docker-compose)
+# ou, sem ela, um SQLite temporário. A réplica de leitura aponta para um segundo banco
+# local (TEST_REPLICA_URL ou outro SQLite), sem replicação entre eles: o teste de
+# roteamento grava na "réplica" o que quer que ela devolva.
+#
+# Uso: python -m pytest -q
+
+import asyncio
+import os
+import tempfile
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_tmp}/primary.db")
+os.environ.setdefault("DATABASE_REPLICA_URL", os.environ.get("TEST_REPLICA_URL", f"sqlite+aiosqlite:///{_tmp}/replica.db"))
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("PASSWORD_BCRYPT_ROUNDS", "4") # bcrypt barato nos testes
+os.environ.setdefault("QUERY_BUDGET_MODE", "raise")
+
+from app import migrations
+from app.database import Base, engine, replica_engine
+from app.services import product_cache, replica_routing
+
+async def reset_databases() -> None:
+    """Recria o schema do primário (pelas migrações) e da réplica, e zera o estado em memória."""
+    product_cache.reset()
+    replica_routing.reset()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await migrations.migrate()
+    async with replica_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+def run(coro_fn):
+    """
+    Roda um teste assíncrono num event loop novo, com bancos limpos. As conexões dos
+    pools ficam presas ao loop em que foram abertas, por isso são descartadas no fim.
+    """
+    async def wrapper():
+        try:
+            await reset_databases()
+            await coro_fn()
+        finally:
+            await engine.dispose()
+            await replica_engine.dispose()
+    asyncio.run(wrapper())
+
+async def create_user(email: str, password: str = "senha-de-teste", is_admin: bool = False) -> int:
+    """Cria um usuário direto no primário e retorna o ID."""
+    from sqlalchemy import insert
+    from app.database import async_session_maker
+    from app.models.user import User
+    from app.services import auth_service
+
+    async with async_session_maker() as db:
+        user_id = await db.scalar(
+            insert(User)
+            .values(email=email, hashed_password=await auth_service.hash_password(password), is_admin=is_admin)
+            .returning(User.id)
+        )
+        await db.commit()
+    return user_id
+
+def api_client():
+    """Cliente httpx que fala com a aplicação em processo (sem servidor)."""
+    import httpx
+    from app.main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+async def login(client, email: str, password: str = "senha-de-teste") -> dict:
+    """Faz login e retorna o cabeçalho Authorization."""
+    response = await client.post("/token", data={"username": email, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
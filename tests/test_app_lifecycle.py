@@ -0,0 +1,15 @@
+# tests/test_app_lifecycle.py
+
+from app.main import BACKGROUND_TASKS, app
+from tests.conftest import run
+
+def test_shutdown_stops_background_tasks():
+    async def scenario():
+        await app.router.startup()
+        tasks = [getattr(app.state, name) for name in BACKGROUND_TASKS]
+        assert all(not task.done() for task in tasks)
+
+        await app.router.shutdown()
+        assert all(task.cancelled() for task in tasks)
+        assert all(getattr(app.state, name) is None for name in BACKGROUND_TASKS)
+    run(scenario)
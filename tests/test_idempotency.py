@@ -0,0 +1,68 @@
+# tests/test_idempotency.py
+
+from datetime import timedelta
+
+from sqlalchemy import insert, select, update
+
+from app.crud import idempotency as crud_idempotency
+from app.database import async_session_maker
+from app.models.idempotency import IdempotencyKey
+from app.models.product import Product
+from tests.conftest import api_client, create_user, login, run
+
+async def _create_product() -> int:
+    async with async_session_maker() as db:
+        product_id = await db.scalar(
+            insert(Product).values(name="Caneca", price=10.0, stock=100, is_active=True).returning(Product.id)
+        )
+        await db.commit()
+    return product_id
+
+def test_replay_returns_same_order_and_other_body_is_rejected():
+    async def scenario():
+        product_id = await _create_product()
+        await create_user("cliente@example.com")
+        async with api_client() as client:
+            headers = {**await login(client, "cliente@example.com"), "Idempotency-Key": "pedido-1"}
+            body = {"items": [{"product_id": product_id, "quantity": 2}]}
+
+            first = await client.post("/orders/", json=body, headers=headers)
+            replay = await client.post("/orders/", json=body, headers=headers)
+            other_body = await client.post(
+                "/orders/", json={"items": [{"product_id": product_id, "quantity": 5}]}, headers=headers
+            )
+
+        assert first.status_code == 201, first.text
+        assert replay.status_code == 201
+        assert replay.headers["Idempotent-Replayed"] == "true"
+        assert replay.json()["id"] == first.json()["id"]
+        assert other_body.status_code == 422
+        async with async_session_maker() as db:
+            assert await db.scalar(select(Product.stock).where(Product.id == product_id)) == 98
+    run(scenario)
+
+def test_purge_uses_database_clock():
+    async def scenario():
+        user_id = await create_user("cliente@example.com")
+        async with async_session_maker() as db:
+            await db.execute(insert(IdempotencyKey), [
+                {"user_id": user_id, "key": "recente"},
+                {"user_id": user_id, "key": "antiga"},
+            ])
+            await db.commit()
+            # Envelhece uma das chaves a partir do horário gravado pelo próprio banco
+            rows = (await db.execute(select(IdempotencyKey.key, IdempotencyKey.created_at))).all()
+            created_at = {row.key: row.created_at for row in rows}
+            await db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.key == "antiga")
+                .values(created_at=created_at["antiga"] - timedelta(hours=25))
+            )
+            await db.commit()
+
+            removed = await crud_idempotency.delete_expired_keys(db, ttl=timedelta(hours=24))
+            remaining = (await db.execute(select(IdempotencyKey.key))).scalars().all()
+
+        assert removed == 1
+        assert remaining == ["recente"]
+    run(scenario)
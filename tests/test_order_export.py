@@ -0,0 +1,58 @@
+# tests/test_order_export.py
+
+import csv
+import io
+
+from sqlalchemy import insert
+
+from app.database import async_session_maker
+from app.models.order import Order, OrderItem
+from app.models.product import Product
+from app.services.order_export import CSV_COLUMNS
+from tests.conftest import api_client, create_user, login, run
+
+def _rows(response) -> list[list[str]]:
+    return list(csv.reader(io.StringIO(response.text)))
+
+def test_empty_csv_export_still_has_header():
+    async def scenario():
+        await create_user("admin@example.com", is_admin=True)
+        async with api_client() as client:
+            headers = await login(client, "admin@example.com")
+            response = await client.get("/orders/export", params={"format": "csv", "status": "shipped"}, headers=headers)
+
+        assert response.status_code == 200
+        assert _rows(response) == [CSV_COLUMNS]
+    run(scenario)
+
+def test_csv_export_has_one_row_per_item():
+    async def scenario():
+        admin_id = await create_user("admin@example.com", is_admin=True)
+        async with async_session_maker() as db:
+            product_id = await db.scalar(
+                insert(Product).values(name="Caneca", price=10.0, stock=10, is_active=True).returning(Product.id)
+            )
+            with_items = await db.scalar(
+                insert(Order).values(user_id=admin_id, total_amount=30.0, status="pending").returning(Order.id)
+            )
+            without_items = await db.scalar(
+                insert(Order).values(user_id=admin_id, total_amount=0.0, status="pending").returning(Order.id)
+            )
+            await db.execute(insert(OrderItem), [
+                {"order_id": with_items, "product_id": product_id, "quantity": 1, "price_at_purchase": 10.0},
+                {"order_id": with_items, "product_id": product_id, "quantity": 2, "price_at_purchase": 10.0},
+            ])
+            await db.commit()
+
+        async with api_client() as client:
+            headers = await login(client, "admin@example.com")
+            response = await client.get("/orders/export", params={"format": "csv"}, headers=headers)
+
+        header, *rows = _rows(response)
+        assert header == CSV_COLUMNS
+        by_order = {}
+        for row in rows:
+            by_order.setdefault(int(row[0]), []).append(row)
+        assert [row[7] for row in by_order[with_items]] == ["1", "2"]
+        assert [row[5:] for row in by_order[without_items]] == [["", "", "", ""]]
+    run(scenario)
@@ -0,0 +1,44 @@
+# tests/test_order_status.py
+
+from sqlalchemy import insert
+
+from app.database import async_session_maker
+from app.models.order import Order
+from tests.conftest import api_client, create_user, login, run
+
+async def _create_order(user_id: int, status: str) -> int:
+    async with async_session_maker() as db:
+        order_id = await db.scalar(
+            insert(Order).values(user_id=user_id, total_amount=0.0, status=status).returning(Order.id)
+        )
+        await db.commit()
+    return order_id
+
+def test_single_update_follows_transition_table():
+    async def scenario():
+        admin_id = await create_user("admin@example.com", is_admin=True)
+        order_id = await _create_order(admin_id, "pending")
+        async with api_client() as client:
+            headers = await login(client, "admin@example.com")
+            url = f"/orders/{order_id}/status"
+
+            unknown = await client.put(url, json={"status": "lost"}, headers=headers)
+            skipped = await client.put(url, json={"status": "delivered"}, headers=headers)
+            allowed = await client.put(url, json={"status": "processing"}, headers=headers)
+
+        assert unknown.status_code == 422
+        assert skipped.status_code == 409
+        assert allowed.status_code == 200, allowed.text
+        assert allowed.json()["status"] == "processing"
+    run(scenario)
+
+def test_cancelled_order_cannot_be_reopened():
+    async def scenario():
+        admin_id = await create_user("admin@example.com", is_admin=True)
+        order_id = await _create_order(admin_id, "cancelled")
+        async with api_client() as client:
+            headers = await login(client, "admin@example.com")
+            response = await client.put(f"/orders/{order_id}/status", json={"status": "pending"}, headers=headers)
+
+        assert response.status_code == 409
+    run(scenario)
@@ -0,0 +1,16 @@
+# tests/test_password_hashing.py
+
+import asyncio
+
+from app.config import settings
+from app.services import auth_service
+
+def test_hashing_under_contention_works_across_event_loops():
+    async def contend():
+        # Mais tarefas que vagas: algumas esperam no semáforo
+        passwords = [f"senha-{i}" for i in range(settings.PASSWORD_HASH_MAX_WORKERS * 3)]
+        hashes = await asyncio.gather(*(auth_service.hash_password(password) for password in passwords))
+        assert all(auth_service.verify_password(p, h) for p, h in zip(passwords, hashes))
+
+    asyncio.run(contend())
+    asyncio.run(contend()) # Um loop novo não pode herdar o semáforo do anterior
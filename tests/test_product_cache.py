@@ -0,0 +1,39 @@
+# tests/test_product_cache.py
+
+from sqlalchemy import insert
+
+from app.database import async_session_maker, replica_session_maker
+from app.models.product import Product
+from app.services import product_cache
+from tests.conftest import api_client, create_user, login, run
+
+def test_checkout_drops_only_the_purchased_products():
+    async def scenario():
+        await create_user("cliente@example.com")
+        for session_maker in (async_session_maker, replica_session_maker):
+            async with session_maker() as db:
+                await db.execute(insert(Product), [
+                    {"id": 1, "name": "Caneca", "price": 10.0, "stock": 10, "is_active": True},
+                    {"id": 2, "name": "Livro", "price": 30.0, "stock": 10, "is_active": True},
+                ])
+                await db.commit()
+
+        async with api_client() as client:
+            for path in ("/products/", "/products/1", "/products/2"):
+                assert (await client.get(path)).status_code == 200
+            assert product_cache.stats()["size"] == 3
+
+            headers = await login(client, "cliente@example.com")
+            order = await client.post("/orders/", json={"items": [{"product_id": 1, "quantity": 1}]}, headers=headers)
+            assert order.status_code == 201, order.text
+
+        stats = product_cache.stats()
+        assert stats["invalidations"] == 0
+        assert stats["size"] == 2 # A listagem e o produto 2 continuam em cache
+
+        async with api_client() as other: # Sem o cookie de read-your-writes de quem comprou
+            await other.get("/products/1")
+            await other.get("/products/2")
+        assert product_cache.stats()["misses"] == stats["misses"] + 1
+        assert product_cache.stats()["hits"] == stats["hits"] + 1
+    run(scenario)
@@ -0,0 +1,51 @@
+# tests/test_product_import.py
+
+import asyncio
+
+from app.config import settings
+from app.services import product_import
+
+async def _chunks(data: bytes, size: int = 7):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+def _collect(iterator) -> list:
+    async def consume():
+        return [item async for item in iterator]
+    return asyncio.run(consume())
+
+def test_oversized_line_is_rejected_and_reading_resumes(monkeypatch):
+    monkeypatch.setattr(settings, "PRODUCT_IMPORT_MAX_RECORD_BYTES", 32)
+    data = b'{"name": "a"}\n' + b"x" * 500 + b'\n{"name": "b"}'
+    records = _collect(product_import._iter_ndjson_records(_chunks(data)))
+
+    assert [number for number, _ in records] == [1, 2, 3]
+    assert records[0][1] == {"name": "a"}
+    assert isinstance(records[1][1], ValueError)
+    assert records[2][1] == {"name": "b"}
+
+def test_upload_without_newlines_stays_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "PRODUCT_IMPORT_MAX_RECORD_BYTES", 64)
+    records = _collect(product_import._iter_lines(_chunks(b"y" * 10_000, size=100)))
+
+    assert len(records) == 1
+    assert isinstance(records[0][1], ValueError)
+
+def test_csv_unbalanced_quote_is_rejected(monkeypatch):
+    monkeypatch.setattr(settings, "PRODUCT_IMPORT_MAX_RECORD_BYTES", 40)
+    data = (
+        b"name,price,stock\n"
+        b'"Caneca,10,5\n' + b"continua sem fechar aspas\n" * 10 +
+        b"Livro,20,3\n"
+    )
+    records = _collect(product_import._iter_csv_records(_chunks(data)))
+
+    assert isinstance(records[0][1], ValueError)
+    assert records[0][0] == 2
+    assert records[-1][1] == {"name": "Livro", "price": "20", "stock": "3"}
+
+def test_csv_multiline_field_is_reassembled():
+    data = b'name,description,price\nCaneca,"linha 1\nlinha 2",10\n'
+    records = _collect(product_import._iter_csv_records(_chunks(data, size=3)))
+
+    assert records == [(2, {"name": "Caneca", "description": "linha 1\nlinha 2", "price": "10"})]
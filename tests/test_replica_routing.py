@@ -0,0 +1,110 @@
+# tests/test_replica_routing.py
+#
+# Primário e réplica são dois bancos independentes: cada teste grava em cada um o
+# que quer ler, para saber de onde veio a resposta.
+
+import time
+
+from sqlalchemy import insert, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import database
+from app.database import async_session_maker, replica_engine, replica_session_maker
+from app.models.product import Product
+from app.services import replica_routing
+from tests.conftest import api_client, create_user, login, run
+
+async def _create_product(name_on_primary: str, name_on_replica: str) -> int:
+    values = {"id": 1, "price": 10.0, "stock": 5, "is_active": True}
+    async with async_session_maker() as db:
+        await db.execute(insert(Product).values(name=name_on_primary, **values))
+        await db.commit()
+    async with replica_session_maker() as db:
+        await db.execute(insert(Product).values(name=name_on_replica, **values))
+        await db.commit()
+    return values["id"]
+
+async def _rename_on_replica(product_id: int, name: str) -> None:
+    async with replica_session_maker() as db:
+        await db.execute(update(Product).where(Product.id == product_id).values(name=name))
+        await db.commit()
+
+def test_reads_go_to_replica():
+    async def scenario():
+        product_id = await _create_product("primário", "réplica")
+        async with api_client() as client:
+            product = await client.get(f"/products/{product_id}")
+            products = await client.get("/products/")
+
+        assert product.json()["name"] == "réplica"
+        assert [item["name"] for item in products.json()] == ["réplica"]
+    run(scenario)
+
+def test_falls_back_to_primary_when_replica_is_down(monkeypatch):
+    async def scenario():
+        product_id = await _create_product("primário", "réplica")
+        broken_engine = create_async_engine("sqlite+aiosqlite:////diretorio-inexistente/replica.db")
+        monkeypatch.setattr(database, "replica_session_maker", async_sessionmaker(broken_engine, class_=AsyncSession))
+        try:
+            async with api_client() as client:
+                response = await client.get(f"/products/{product_id}")
+        finally:
+            await broken_engine.dispose()
+
+        assert response.status_code == 200
+        assert response.json()["name"] == "primário"
+        assert replica_routing.stats()["available"] is False
+    run(scenario)
+
+def test_falls_back_to_primary_when_replica_pool_times_out(monkeypatch):
+    async def scenario():
+        product_id = await _create_product("primário", "réplica")
+        tiny_engine = create_async_engine(replica_engine.url, pool_size=1, max_overflow=0, pool_timeout=0.1)
+        monkeypatch.setattr(database, "replica_session_maker", async_sessionmaker(tiny_engine, class_=AsyncSession))
+        try:
+            async with tiny_engine.connect(): # Ocupa a única conexão do pool
+                async with api_client() as client:
+                    response = await client.get(f"/products/{product_id}")
+        finally:
+            await tiny_engine.dispose()
+
+        assert response.json()["name"] == "primário"
+        assert replica_routing.stats()["available"] is False
+    run(scenario)
+
+def test_writer_reads_primary_and_replica_reads_do_not_refill_cache():
+    async def scenario():
+        product_id = await _create_product("antigo", "antigo")
+        await create_user("admin@example.com", is_admin=True)
+        async with api_client() as writer, api_client() as other:
+            headers = await login(writer, "admin@example.com")
+            assert (await other.get(f"/products/{product_id}")).json()["name"] == "antigo" # Vai para o cache
+
+            updated = await writer.put(f"/products/{product_id}", json={"name": "novo"}, headers=headers)
+            assert replica_routing.READ_PRIMARY_COOKIE in updated.cookies
+
+            # Quem escreveu lê do primário, apesar da réplica ainda não ter a mudança
+            assert (await writer.get(f"/products/{product_id}")).json()["name"] == "novo"
+
+            # Outro cliente lê da réplica atrasada, mas esse valor não volta ao cache...
+            stale = await other.get("/products/")
+            assert [item["name"] for item in stale.json()] == ["antigo"]
+
+            # ...então, quando a réplica alcança o primário, a leitura seguinte já vê o novo nome
+            await _rename_on_replica(product_id, "novo")
+            assert [item["name"] for item in (await other.get("/products/")).json()] == ["novo"]
+    run(scenario)
+
+def test_forged_read_primary_cookie_is_ignored():
+    async def scenario():
+        product_id = await _create_product("primário", "réplica")
+        far_future = time.time() + 365 * 24 * 3600
+        async with api_client() as client:
+            client.cookies.set(replica_routing.READ_PRIMARY_COOKIE, f"{far_future:.3f}")
+            forged = await client.get(f"/products/{product_id}")
+            client.cookies.set(replica_routing.READ_PRIMARY_COOKIE, f"{time.time() + 2:.3f}")
+            genuine = await client.get(f"/products/{product_id}")
+
+        assert forged.json()["name"] == "réplica"
+        assert genuine.json()["name"] == "primário"
+    run(scenario)
@@ -0,0 +1,75 @@
+# tests/test_stock_reservation.py
+
+import asyncio
+
+from fastapi import HTTPException
+from sqlalchemy import insert, select
+
+from app.database import async_session_maker
+from app.models.product import Product
+from app.services import stock_service
+from tests.conftest import run
+
+CLIENTS = 30
+STOCK = 10
+
+async def _create_product(stock: int) -> int:
+    async with async_session_maker() as db:
+        product_id = await db.scalar(
+            insert(Product).values(name="SKU disputado", price=9.9, stock=stock, is_active=True).returning(Product.id)
+        )
+        await db.commit()
+    return product_id
+
+async def _stock(product_id: int) -> int:
+    async with async_session_maker() as db:
+        return await db.scalar(select(Product.stock).where(Product.id == product_id))
+
+def test_concurrent_reservations_never_oversell():
+    async def scenario():
+        product_id = await _create_product(STOCK)
+        observed = []
+
+        async def client(quantity: int) -> bool:
+            async with async_session_maker() as db:
+                try:
+                    await stock_service.reserve_stock(db, {product_id: quantity})
+                except HTTPException as exc:
+                    assert exc.status_code == 400 # Estoque insuficiente, nunca erro de SQL
+                    return False
+                await db.commit()
+            observed.append(await _stock(product_id))
+            return True
+
+        quantities = [1 + n % 2 for n in range(CLIENTS)] # Pedidos de 1 e 2 unidades
+        results = await asyncio.gather(*(client(quantity) for quantity in quantities))
+
+        sold = sum(quantity for quantity, ok in zip(quantities, results) if ok)
+        final_stock = await _stock(product_id)
+        assert sold <= STOCK
+        assert final_stock == STOCK - sold
+        assert final_stock >= 0
+        assert all(stock >= 0 for stock in observed)
+        assert any(not ok for ok in results) # A demanda (45 unidades) passa do estoque
+    run(scenario)
+
+def test_reservation_rejects_whole_order_when_one_item_is_short():
+    async def scenario():
+        plenty = await _create_product(100)
+        async with async_session_maker() as db:
+            scarce = await db.scalar(
+                insert(Product).values(name="Escasso", price=1.0, stock=1, is_active=True).returning(Product.id)
+            )
+            await db.commit()
+
+        async with async_session_maker() as db:
+            try:
+                await stock_service.reserve_stock(db, {plenty: 5, scarce: 2})
+            except HTTPException as exc:
+                assert exc.status_code == 400
+            else:
+                raise AssertionError("a reserva deveria falhar")
+
+        assert await _stock(plenty) == 100 # Nada foi baixado
+        assert await _stock(scarce) == 1
+    run(scenario)